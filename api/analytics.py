@@ -0,0 +1,124 @@
+"""
+Vectorized analytics over the numeric activity metrics.
+
+A user's metrics are read with a single `values_list()` query into columnar
+NumPy arrays (dates as datetime64[D], metrics as float64 with NaN for
+missing values). Every statistic is then an array operation over those
+columns or over the per-day totals built from them with `bincount`, so a
+year of daily data takes milliseconds rather than a Python loop per row.
+
+NumPy is optional: without it `available()` is False and the analytics
+endpoint answers 503.
+"""
+from datetime import timedelta
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover - numpy is optional
+    numpy = None
+
+METRICS = ['duration_minutes', 'calories', 'distance_km', 'steps']
+PERCENTILES = [50, 90, 95]
+# Decimals kept for averages, percentiles and slopes in responses.
+PRECISION = 3
+
+
+def available():
+    return numpy is not None
+
+
+def load_metrics(queryset, metrics=METRICS):
+    """
+    ('dates', {metric: values}) for the activities in `queryset`, one array
+    element per activity. Missing metric values are NaN.
+    """
+    rows = list(queryset.values_list('date', *metrics))
+    if not rows:
+        return numpy.empty(0, dtype='datetime64[D]'), {metric: numpy.empty(0) for metric in metrics}
+    table = numpy.array(rows, dtype=object)
+    values = table[:, 1:].astype(numpy.float64)
+    return table[:, 0].astype('datetime64[D]'), {metric: values[:, n] for n, metric in enumerate(metrics)}
+
+
+def daily_totals(dates, values, start, end):
+    """Sum of `values` per day from `start` to `end` inclusive; days without data are 0."""
+    days = (dates - numpy.datetime64(start, 'D')).astype(numpy.int64)
+    size = (end - start).days + 1
+    keep = ~numpy.isnan(values) & (days >= 0) & (days < size)
+    return numpy.bincount(days[keep], weights=values[keep], minlength=size)
+
+
+def rolling_mean(series, window):
+    """
+    Trailing mean over `window` days, ending on each day. The first
+    `window - 1` days average over the days available so far.
+    """
+    sums = numpy.concatenate(([0.0], numpy.cumsum(series)))
+    ends = numpy.arange(1, len(series) + 1)
+    starts = numpy.maximum(ends - window, 0)
+    return (sums[ends] - sums[starts]) / (ends - starts)
+
+
+def weekly_totals(series, start):
+    """(week starts, totals) for Monday-based weeks overlapping the series."""
+    offset = start.weekday()
+    weeks = (numpy.arange(len(series)) + offset) // 7
+    totals = numpy.bincount(weeks, weights=series)
+    first_monday = numpy.datetime64(start - timedelta(days=offset), 'D')
+    return first_monday + 7 * numpy.arange(len(totals)), totals
+
+
+def percentiles(values, q=PERCENTILES):
+    """Percentiles of the recorded values, or None for each if there are none."""
+    values = values[~numpy.isnan(values)]
+    if not len(values):
+        return [None] * len(q)
+    return numpy.percentile(values, q).tolist()
+
+
+def trend_slope(series):
+    """Least-squares slope of the series, in metric units per day."""
+    if len(series) < 2:
+        return None
+    x = numpy.arange(len(series), dtype=numpy.float64)
+    x -= x.mean()
+    return float(numpy.dot(x, series - series.mean()) / numpy.dot(x, x))
+
+
+def rounded(array):
+    return numpy.round(array, PRECISION).tolist()
+
+
+def analyze(queryset, start, end, window=7, metrics=METRICS):
+    """
+    Per-day, rolling, weekly and distribution statistics for each metric of
+    the activities in `queryset` between `start` and `end`, laid out in
+    columns: `dates` and `weeks` are shared by every metric's series.
+    """
+    dates, columns = load_metrics(queryset.filter(date__gte=start, date__lte=end), metrics)
+    days = numpy.arange(numpy.datetime64(start, 'D'), numpy.datetime64(end, 'D') + 1)
+    week_starts = None
+    results = {}
+    for metric, values in columns.items():
+        daily = daily_totals(dates, values, start, end)
+        week_starts, weekly = weekly_totals(daily, start)
+        slope = trend_slope(daily)
+        results[metric] = {
+            'count': int(numpy.count_nonzero(~numpy.isnan(values))),
+            'total': round(float(daily.sum()), PRECISION),
+            'daily': rounded(daily),
+            'rolling_average': rounded(rolling_mean(daily, window)),
+            'weekly': rounded(weekly),
+            'percentiles': {
+                f"p{q}": None if value is None else round(value, PRECISION)
+                for q, value in zip(PERCENTILES, percentiles(values))
+            },
+            'trend_per_day': None if slope is None else round(slope, PRECISION),
+        }
+    if week_starts is None:
+        week_starts, _ = weekly_totals(numpy.zeros(len(days)), start)
+    return {
+        'dates': days.astype(str).tolist(),
+        'weeks': week_starts.astype(str).tolist(),
+        'metrics': results,
+    }
@@ -0,0 +1,174 @@
+"""
+Async variants of the activity create, list and detail views and of login
+and registration, routed in place of the DRF views when ASYNC_ACTIVITY_VIEWS
+is enabled. That is opt-in, also under SERVER_MODE=asgi: list and detail
+here answer JSON only, without the conditional GET of ConditionalGetMixin or
+the response cache of CachedResponseMixin.
+
+DRF views are synchronous, so these are plain Django async views that reuse
+the DRF pieces which do no I/O: authentication classes, ActivitySerializer,
+the cursor paginator and the JSON renderer. Reads go through the async ORM.
+Writes run in a worker thread with sync_to_async because the async ORM cannot
+open transactions, and api.services has to update the derived tables in the
+same transaction as the activity. Password hashing runs in the bounded pool
+of api.hashers, so a burst of logins neither blocks the event loop nor queues
+up behind the single thread that runs sync code under ASGI.
+"""
+from asgiref.sync import sync_to_async
+from django.contrib.auth import aauthenticate
+from django.contrib.auth.models import update_last_login
+from django.http import HttpResponse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions, status
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from .filters import ActivityFilterBackend
+from .hashers import amake_password
+from .instrumentation import timed_serialization
+from .mixins import SparseFieldsMixin
+from .models import Activity
+from .pagination import ActivityCursorPagination
+from .renderers import FastJSONRenderer
+from .serializers import ActivityRowSerializer, ActivitySerializer, UserRegistrationSerializer
+from .services import create_activity, delete_activity, update_activity
+
+
+class AsyncAPIView(View):
+    authentication_classes = api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    parser_classes = api_settings.DEFAULT_PARSER_CLASSES
+    requires_authentication = True
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # As DRF's APIView.as_view() does: requests are authenticated by the
+        # Authorization header, not cookies, so CsrfViewMiddleware (the
+        # classic pipeline, or the admin's) must not ask them for a token.
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.request = Request(
+            request,
+            parsers=[parser() for parser in self.parser_classes],
+            authenticators=[authentication() for authentication in self.authentication_classes],
+        )
+        try:
+            if self.requires_authentication:
+                user = await sync_to_async(lambda: self.request.user)()
+                if not user or not user.is_authenticated:
+                    raise exceptions.NotAuthenticated()
+                request.user = user
+            return await super().dispatch(request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            return self.handle_exception(exc)
+
+    def handle_exception(self, exc):
+        detail = exc.detail if isinstance(exc.detail, (list, dict)) else {"detail": exc.detail}
+        response = self.render(detail, exc.status_code)
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+            response.status_code = status.HTTP_401_UNAUTHORIZED
+            authenticators = self.request.authenticators
+            if authenticators:
+                response['WWW-Authenticate'] = authenticators[0].authenticate_header(self.request)
+        return response
+
+    def render(self, data, status_code=status.HTTP_200_OK):
+        renderer = FastJSONRenderer()
+        return HttpResponse(renderer.render(data), status=status_code, content_type=renderer.media_type)
+
+
+class AsyncRegisterView(AsyncAPIView):
+    requires_authentication = False
+
+    async def post(self, request):
+        serializer = UserRegistrationSerializer(data=self.request.data)
+        await sync_to_async(serializer.is_valid)(raise_exception=True)
+        password_hash = await amake_password(serializer.validated_data['password'])
+        await sync_to_async(serializer.save)(password_hash=password_hash)
+        return self.render({"detail": "User created successfully."}, status.HTTP_201_CREATED)
+
+
+class AsyncTokenObtainPairView(AsyncAPIView):
+    requires_authentication = False
+
+    async def post(self, request):
+        serializer = TokenObtainPairSerializer(data=self.request.data, context={'request': self.request})
+        # Field checks only: the serializer's validate() would authenticate,
+        # and so hash, on the event loop.
+        credentials = serializer.to_internal_value(self.request.data)
+        user = await aauthenticate(request, **credentials)
+        if not jwt_settings.USER_AUTHENTICATION_RULE(user):
+            raise exceptions.AuthenticationFailed(
+                serializer.error_messages['no_active_account'], 'no_active_account',
+            )
+
+        refresh = await sync_to_async(serializer.get_token)(user)
+        if jwt_settings.UPDATE_LAST_LOGIN:
+            await sync_to_async(update_last_login)(None, user)
+        return self.render({'refresh': str(refresh), 'access': str(refresh.access_token)})
+
+
+class AsyncActivityCreateView(AsyncAPIView):
+    async def post(self, request):
+        serializer = ActivitySerializer(data=self.request.data)
+        serializer.is_valid(raise_exception=True)
+        await sync_to_async(create_activity)(request.user, serializer)
+        return self.render(serializer.data, status.HTTP_201_CREATED)
+
+
+# List all user activities
+class AsyncActivityListView(SparseFieldsMixin, AsyncAPIView):
+    async def get(self, request):
+        queryset = Activity.objects.filter(user=request.user).order_by('-date', '-id')
+        queryset = ActivityFilterBackend().filter_queryset(self.request, queryset, self)
+
+        serializer = ActivityRowSerializer(self.get_requested_fields(), extra_columns=('date', 'id'))
+        serialize = serializer.serialize_columnar if self.is_columnar() else serializer.serialize
+        queryset = serializer.values_list(queryset)
+
+        paginator = ActivityCursorPagination()
+        if not paginator.is_requested(self.request):
+            rows = [row async for row in queryset]
+            with timed_serialization(request):
+                data = serialize(rows)
+            return self.render(data)
+
+        page = paginator.get_page_queryset(queryset, self.request)
+        rows = paginator.set_page([row async for row in page], position=serializer.position)
+        with timed_serialization(request):
+            data = serialize(rows)
+        return self.render(paginator.get_paginated_response(data).data)
+
+
+class AsyncActivityDetailView(SparseFieldsMixin, AsyncAPIView):
+    async def get_object(self, request, pk):
+        queryset = Activity.objects.filter(user=request.user)
+        fields = self.get_requested_fields()
+        if fields:
+            queryset = queryset.only(*fields)
+        try:
+            return await queryset.aget(pk=pk)
+        except Activity.DoesNotExist:
+            raise exceptions.NotFound("No Activity matches the given query.")
+
+    async def get(self, request, pk):
+        instance = await self.get_object(request, pk)
+        return self.render(ActivitySerializer(instance, fields=self.get_requested_fields()).data)
+
+    async def patch(self, request, pk):
+        instance = await self.get_object(request, pk)
+        serializer = ActivitySerializer(instance, data=self.request.data, partial=True)
+        serializer.is_valid(raise_exception=True)
+        await sync_to_async(update_activity)(request.user, serializer)
+        return self.render({"detail": "Activity updated successfully!"})
+
+    # Like the sync view, PUT is applied as a partial update
+    put = patch
+
+    async def delete(self, request, pk):
+        instance = await self.get_object(request, pk)
+        await sync_to_async(delete_activity)(request.user, instance)
+        return self.render({"detail": "Activity deleted successfully!"})
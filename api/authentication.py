@@ -0,0 +1,179 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .cache import bump_counter, cache_is_shared, get_counter
+from .db_routers import pin_if_recent_write
+from .hashers import amake_password, averify_password
+
+
+class UserCache:
+    """
+    Small thread-safe LRU of User rows with a time-to-live.
+
+    The cache lives in process memory. Entries carry the user's generation
+    (see user_generation()) from when they were loaded and are dropped once
+    it changes, so with a shared cache a user saved by another worker is
+    reloaded on the next request. With a per-process cache the generation is
+    always None, and another worker's change is only picked up once the
+    entry expires; keep the TTL short then.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id, generation=None):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            user, expires, loaded_generation = entry
+            if expires < time.monotonic() or loaded_generation != generation:
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return user
+
+    def set(self, user_id, user, ttl, max_size, generation=None):
+        with self._lock:
+            self._entries[user_id] = (user, time.monotonic() + ttl, generation)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache()
+
+
+def generation_key(user_id):
+    return f"auth:user-generation:{user_id}"
+
+
+def user_generation(user_id):
+    """
+    Counter in the shared cache bumped whenever the user is saved or deleted,
+    or None with a per-process cache, where other workers could not see it.
+    """
+    if not cache_is_shared():
+        return None
+    return get_counter(generation_key(user_id))
+
+
+def bump_user_generation(user_id):
+    if not cache_is_shared():
+        return
+    key = generation_key(user_id)
+    bump_counter(key)
+    # Again on commit, in case another worker reloaded the old row meanwhile.
+    transaction.on_commit(lambda: bump_counter(key))
+
+
+def invalidate_cached_user(user_id):
+    # Tokens carry the id claim as an int, or as a string for non-integer keys
+    user_cache.invalidate(user_id)
+    user_cache.invalidate(str(user_id))
+    bump_user_generation(user_id)
+
+
+class CachedUserJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that skips the per-request user query for users seen
+    within the last JWT_USER_CACHE_TTL seconds.
+
+    Cached users are still checked for `is_active` and password-based token
+    revocation, and are evicted as soon as the row is saved or deleted (see
+    api.signals): in every worker with a shared cache, otherwise only in the
+    worker that saved it.
+    """
+
+    def authenticate(self, request):
+        result = super().authenticate(request)
+        if result is not None:
+            # First point at which the user is known: keep their reads on the
+            # primary for a while after they wrote (see api.db_routers).
+            pin_if_recent_write(result[0].pk)
+        return result
+
+    def get_user(self, validated_token):
+        ttl = settings.JWT_USER_CACHE_TTL
+        if ttl <= 0:
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        # Read before the row: a save that lands in between leaves the
+        # entry with an outdated generation rather than hiding the change.
+        generation = user_generation(user_id)
+        user = user_cache.get(user_id, generation)
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.set(user_id, user, ttl, settings.JWT_USER_CACHE_MAX_SIZE, generation)
+        else:
+            self.check_user(user, validated_token)
+
+        # Hand every request its own copy so nothing leaks between requests.
+        return copy.copy(user)
+
+    def check_user(self, user, validated_token):
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+
+class PooledHashingModelBackend(ModelBackend):
+    """
+    ModelBackend whose async path runs password hashing in the bounded pool
+    of api.hashers.
+
+    Django's own aauthenticate() verifies the hash on the event loop, which
+    stalls every other request on the worker for the length of a hash. The
+    sync path is unchanged.
+    """
+
+    async def aauthenticate(self, request, username=None, password=None, **kwargs):
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = await UserModel._default_manager.aget_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # Hash once anyway so unknown usernames take as long (#20760).
+            await amake_password(password)
+            return None
+
+        is_correct, must_update = await averify_password(password, user.password)
+        if not is_correct:
+            return None
+        if must_update:
+            # Upgrade to the preferred hasher; not a password change.
+            user.password = await amake_password(password)
+            await user.asave(update_fields=['password'])
+        return user if self.user_can_authenticate(user) else None
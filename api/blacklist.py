@@ -0,0 +1,112 @@
+"""
+Fast negative lookups for the refresh-token blacklist.
+
+Every refresh and logout used to run a `token_blacklist_blacklistedtoken`
+query. Instead, each process keeps a Bloom filter of the jtis of blacklisted,
+unexpired tokens and only asks the database when the filter (or the shared
+cache marker written at blacklist time) says the token may be blacklisted.
+
+The filter is loaded from the database on first use and then caught up with
+rows blacklisted since the previous sync (minus TOKEN_BLACKLIST_SYNC_OVERLAP
+seconds, for transactions that committed late) at most once every
+TOKEN_BLACKLIST_SYNC_INTERVAL seconds. Tokens blacklisted by another worker
+in between are covered by the cache marker, which only works when every
+worker shares the cache: with a per-process cache (the LocMemCache default)
+the filter is bypassed and every check goes to the database.
+"""
+import hashlib
+import math
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from .cache import cache_is_shared
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate=0.001):
+        self.capacity = max(capacity, 1024)
+        self.size = int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, value):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'big')
+        second = int.from_bytes(digest[8:], 'big') | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+class TokenBlacklistFilter:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._bloom = None
+            self._synced_at = None
+
+    def _load(self):
+        synced_at = timezone.now()
+        rows = list(
+            BlacklistedToken.objects
+            .filter(token__expires_at__gt=synced_at)
+            .values_list('token__jti', flat=True)
+        )
+        self._bloom = BloomFilter(capacity=2 * len(rows))
+        self._add_rows(rows, synced_at)
+
+    def _catch_up(self):
+        # A window by time rather than by id: ids are assigned at insert, not
+        # at commit, so a row can become visible after one with a higher id.
+        synced_at = timezone.now()
+        since = self._synced_at - timedelta(seconds=settings.TOKEN_BLACKLIST_SYNC_OVERLAP)
+        rows = list(BlacklistedToken.objects.filter(blacklisted_at__gte=since).values_list('token__jti', flat=True))
+        self._add_rows(rows, synced_at)
+
+    def _add_rows(self, jtis, synced_at):
+        for jti in jtis:
+            self._bloom.add(jti)
+        self._synced_at = synced_at
+
+    def sync(self):
+        with self._lock:
+            if self._bloom is None or self._bloom.count > self._bloom.capacity:
+                self._load()
+            elif timezone.now() - self._synced_at >= timedelta(seconds=settings.TOKEN_BLACKLIST_SYNC_INTERVAL):
+                self._catch_up()
+
+    def may_contain(self, jti):
+        if not cache_is_shared():
+            # Other workers' markers are invisible, so a token they just
+            # blacklisted would pass until the next catch-up.
+            return True
+        self.sync()
+        return jti in self._bloom or cache.get(marker_key(jti)) is not None
+
+    def add(self, jti, expires_in):
+        with self._lock:
+            if self._bloom is not None:
+                self._bloom.add(jti)
+        cache.set(marker_key(jti), True, timeout=max(int(expires_in), 1))
+
+
+def marker_key(jti):
+    return f"token_blacklist:{jti}"
+
+
+blacklist_filter = TokenBlacklistFilter()
@@ -0,0 +1,68 @@
+"""
+Per-user response caching for activity reads.
+
+Cached responses are keyed by user id plus a per-user version number. Every
+write bumps the version, so stale entries are never looked up again and
+simply age out of the cache.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+# Backends whose entries are only seen by the process that wrote them.
+PROCESS_LOCAL_CACHES = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+def cache_is_shared():
+    """Whether every worker reads and writes the same default cache."""
+    return settings.CACHES['default']['BACKEND'] not in PROCESS_LOCAL_CACHES
+
+
+def response_cache_enabled():
+    return settings.ACTIVITY_RESPONSE_CACHE_TIMEOUT > 0
+
+
+def version_key(user_id):
+    return f"activities:version:{user_id}"
+
+
+def get_counter(key):
+    # Seeding with the current time means that a counter that was evicted
+    # never comes back with a number that was used before.
+    return cache.get_or_set(key, time.time_ns, timeout=None)
+
+
+def bump_counter(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
+
+
+def get_user_version(user_id):
+    return get_counter(version_key(user_id))
+
+
+def bump_user_version(user_id):
+    if not response_cache_enabled():
+        return
+    key = version_key(user_id)
+    bump_counter(key)
+    # Bump again once the write is committed: a concurrent read may have
+    # cached the pre-commit rows under the new version in between.
+    transaction.on_commit(lambda: bump_counter(key))
+
+
+def response_cache_key(request, namespace):
+    user_id = request.user.pk
+    fingerprint = hashlib.md5(
+        f"{request.get_full_path()}:{request.accepted_renderer.format}".encode()
+    ).hexdigest()
+    return f"activities:{namespace}:{user_id}:{get_user_version(user_id)}:{fingerprint}"
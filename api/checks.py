@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+from .cache import cache_is_shared
+
+
+@register(Tags.caches, Tags.database)
+def check_replica_pin_cache(app_configs, **kwargs):
+    """
+    The read-your-writes pin of api.db_routers lives in the default cache. If
+    every worker has its own cache, a read served by a worker other than the
+    one that took the write goes to a lagging replica.
+    """
+    if settings.DATABASE_REPLICAS and not cache_is_shared():
+        return [Error(
+            "DATABASE_REPLICAS requires a default cache shared by every worker.",
+            hint=(
+                f"{settings.CACHES['default']['BACKEND']} is per-process, so the replica pin set after "
+                "a write is not seen by other workers. Set CACHE_BACKEND to Redis, Memcached or the "
+                "database cache."
+            ),
+            id='api.E001',
+        )]
+    return []
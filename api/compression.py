@@ -0,0 +1,119 @@
+"""
+Content-Encoding negotiation and codecs for CompressionMiddleware.
+
+gzip is always available; brotli and zstd are used when the `brotli` and
+`zstandard` packages are installed. Each codec exposes `compress(data)` for
+buffered responses and `compressor()` returning an object with
+`compress(chunk)` / `flush()` for streaming ones.
+"""
+import zlib
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - zstandard is optional
+    zstandard = None
+
+
+class GzipCodec:
+    name = 'gzip'
+
+    def __init__(self, level=6):
+        self.level = level
+
+    def compressor(self):
+        # wbits=31: zlib stream with a gzip header and trailer.
+        return zlib.compressobj(self.level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        compressor = self.compressor()
+        return compressor.compress(data) + compressor.flush()
+
+
+class BrotliCodec:
+    name = 'br'
+
+    def __init__(self, quality=4):
+        # Low qualities are the usual choice for on-the-fly compression;
+        # the top ones are meant for static assets.
+        self.quality = quality
+
+    def compressor(self):
+        return BrotliStream(brotli.Compressor(quality=self.quality))
+
+    def compress(self, data):
+        return brotli.compress(data, quality=self.quality)
+
+
+class BrotliStream:
+    def __init__(self, compressor):
+        self.compressor = compressor
+
+    def compress(self, chunk):
+        return self.compressor.process(chunk)
+
+    def flush(self):
+        return self.compressor.finish()
+
+
+class ZstdCodec:
+    name = 'zstd'
+
+    def __init__(self, level=3):
+        self.level = level
+
+    def compressor(self):
+        return zstandard.ZstdCompressor(level=self.level).compressobj()
+
+    def compress(self, data):
+        return zstandard.ZstdCompressor(level=self.level).compress(data)
+
+
+def available_codecs():
+    """Supported codecs, most preferred first."""
+    codecs = []
+    if zstandard is not None:
+        codecs.append(ZstdCodec())
+    if brotli is not None:
+        codecs.append(BrotliCodec())
+    codecs.append(GzipCodec())
+    return codecs
+
+
+def parse_accept_encoding(header):
+    """Map each coding in an Accept-Encoding header to its q-value."""
+    accepted = {}
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def negotiate(header, codecs):
+    """
+    Pick the codec the client weights highest, breaking ties by our own
+    preference order. Returns None when nothing acceptable is supported.
+    """
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get('*', 0.0)
+    best, best_q = None, 0.0
+    for codec in codecs:
+        q = accepted.get(codec.name, wildcard)
+        if q > best_q:
+            best, best_q = codec, q
+    return best
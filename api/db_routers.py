@@ -0,0 +1,75 @@
+"""
+Read-replica routing for the api app.
+
+Reads of api models go to one of settings.DATABASE_REPLICAS, except when the
+current context is pinned to the primary:
+
+- for the whole of an unsafe (writing) request, see PrimaryDatabaseMiddleware;
+- for REPLICA_PIN_SECONDS after a user's own write, so they read their changes
+  back even when replicas lag (the pin is kept in the default cache, which
+  must be shared by every worker: system check api.E001 enforces that);
+- inside a transaction on the primary, so reads see the transaction's writes.
+"""
+import contextvars
+import random
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_pinned_to_primary = contextvars.ContextVar('pinned_to_primary', default=False)
+
+
+def set_pinned(pinned):
+    return _pinned_to_primary.set(pinned)
+
+
+def pin_to_primary():
+    """Route reads to the primary for the rest of the current request."""
+    return _pinned_to_primary.set(True)
+
+
+def unpin(token):
+    _pinned_to_primary.reset(token)
+
+
+def pin_key(user_id):
+    return f"db:pin-primary:{user_id}"
+
+
+def remember_write(user_id):
+    if settings.DATABASE_REPLICAS:
+        cache.set(pin_key(user_id), True, timeout=settings.REPLICA_PIN_SECONDS)
+
+
+def pin_if_recent_write(user_id):
+    if settings.DATABASE_REPLICAS and cache.get(pin_key(user_id)):
+        pin_to_primary()
+
+
+class ReadReplicaRouter:
+    route_app_labels = {'api'}
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label not in self.route_app_labels or not settings.DATABASE_REPLICAS:
+            return None
+        if _pinned_to_primary.get() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label in self.route_app_labels:
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas are copies of the primary and are never migrated directly
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
@@ -0,0 +1,56 @@
+import csv
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+
+from .renderers import dumps
+from .serializers import ActivityRowSerializer, ActivitySerializer
+
+# Same columns, in the same order, as the regular activity endpoints.
+EXPORT_FIELDS = ActivitySerializer.Meta.fields
+
+
+class Echo:
+    """Pseudo-buffer for csv.writer: write() hands the line back instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def export_rows(queryset, chunk_size, fields=EXPORT_FIELDS):
+    """
+    Yield plain dicts for every activity in the queryset.
+
+    Rows are read through a server-side cursor with a .values_list()
+    projection, so no model instances are built and only `chunk_size` rows
+    are held in memory at a time.
+    """
+    serializer = ActivityRowSerializer(fields)
+    yield from serializer.iter_representations(serializer.values_list(queryset).iterator(chunk_size=chunk_size))
+
+
+def stream_ndjson(rows):
+    for row in rows:
+        yield dumps(row) + b'\n'
+
+
+def stream_csv(rows, fields=EXPORT_FIELDS):
+    writer = csv.writer(Echo())
+    yield writer.writerow(fields).encode()
+    for row in rows:
+        yield writer.writerow([row[name] for name in fields]).encode()
+
+
+async def async_chunks(chunks, batch_size):
+    """
+    Async iterator over the byte `chunks` of a stream, for ASGI servers,
+    which read a sync iterator to the end before sending the first byte.
+
+    The sync iterator is advanced in the request's thread, where its database
+    cursor lives, `batch_size` chunks per hop, and each batch is sent as one
+    chunk.
+    """
+    chunks = iter(chunks)
+    next_batch = sync_to_async(lambda: b''.join(islice(chunks, batch_size)))
+    while batch := await next_batch():
+        yield batch
@@ -0,0 +1,25 @@
+from rest_framework.filters import BaseFilterBackend
+
+from .serializers import ActivityFilterSerializer
+
+
+class ActivityFilterBackend(BaseFilterBackend):
+    """
+    Narrow activities by ?activity_type=, ?status=, ?date__gte=, ?date__lte=
+    and a case-insensitive ?search= on the description.
+
+    Type and status filters are served by the (user, activity_type, date) and
+    (user, status, date) indexes; the description search is applied on top of
+    the other conditions.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        params = ActivityFilterSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        filters = dict(params.validated_data)
+
+        search = filters.pop('search', None)
+        queryset = queryset.filter(**filters)
+        if search:
+            queryset = queryset.filter(description__icontains=search)
+        return queryset
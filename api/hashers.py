@@ -0,0 +1,74 @@
+"""
+Password hashing profile and a bounded thread pool for hashing off the event
+loop.
+
+PASSWORD_HASHER_PROFILE picks the preferred hasher (see settings). Stored
+hashes made by any other listed hasher, or by the same one with different
+parameters, still verify and are re-encoded with the preferred one on the
+user's next successful login: Django's check_password() does that through
+the hasher's must_update().
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, make_password, verify_password
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """
+    Argon2id with the cost parameters taken from ARGON2_TIME_COST,
+    ARGON2_MEMORY_COST (KiB) and ARGON2_PARALLELISM.
+
+    Django's defaults use 100 MiB and 8 lanes per hash, sized for a single
+    interactive login on an idle machine. Under a login storm every hash
+    competes for the same cores anyway, so one lane and less memory per
+    hash give more logins per second per core. The algorithm name stays
+    "argon2", so stored hashes remain valid whichever hasher is preferred.
+    """
+
+    @property
+    def time_cost(self):
+        return settings.ARGON2_TIME_COST
+
+    @property
+    def memory_cost(self):
+        return settings.ARGON2_MEMORY_COST
+
+    @property
+    def parallelism(self):
+        return settings.ARGON2_PARALLELISM
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_hashing_executor():
+    """
+    Process-wide pool for async views. Both argon2-cffi and hashlib's PBKDF2
+    release the GIL, so up to PASSWORD_HASHING_THREADS hashes run in
+    parallel without blocking the event loop or the thread that runs sync
+    code under ASGI.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.PASSWORD_HASHING_THREADS, thread_name_prefix='password-hashing',
+            )
+        return _executor
+
+
+async def run_hashing(func, *args):
+    return await asyncio.get_running_loop().run_in_executor(get_hashing_executor(), func, *args)
+
+
+async def amake_password(password):
+    return await run_hashing(make_password, password)
+
+
+async def averify_password(password, encoded):
+    """(is_correct, must_update) for a raw password and a stored hash."""
+    return await run_hashing(verify_password, password, encoded)
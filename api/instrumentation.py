@@ -0,0 +1,107 @@
+"""
+In-process per-endpoint request metrics collected by
+api.middleware.QueryInstrumentationMiddleware.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds (ms) of the request duration histogram buckets
+DURATION_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+
+class QueryRecorder:
+    """connection.execute_wrapper callable timing every statement of a request."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.slowest = (0.0, None)
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.count += 1
+            self.total += duration
+            if duration > self.slowest[0]:
+                self.slowest = (duration, sql)
+
+
+@contextmanager
+def timed_serialization(request):
+    """
+    Count the time spent in the block as serialization of the request's
+    response. Views that build their data themselves (the lean list path)
+    wrap that step in it; a no-op unless the request is instrumented.
+    """
+    request = getattr(request, '_request', request)  # a DRF Request wraps the HttpRequest
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if hasattr(request, '_serialize_time'):
+            request._serialize_time += time.perf_counter() - start
+
+
+class EndpointMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def record(self, name, duration, queries, render, serialize=0.0):
+        with self._lock:
+            stats = self._endpoints.setdefault(name, {
+                'requests': 0,
+                'queries': 0,
+                'sql_ms': 0.0,
+                'render_ms': 0.0,
+                'serialize_ms': 0.0,
+                'total_ms': 0.0,
+                'slowest_query_ms': 0.0,
+                'slowest_query': None,
+                'histogram': [0] * (len(DURATION_BUCKETS) + 1),
+            })
+            total_ms = duration * 1000
+            stats['requests'] += 1
+            stats['queries'] += queries.count
+            stats['sql_ms'] += queries.total * 1000
+            stats['render_ms'] += render * 1000
+            stats['serialize_ms'] += serialize * 1000
+            stats['total_ms'] += total_ms
+            slowest_ms, slowest_sql = queries.slowest
+            if slowest_ms * 1000 > stats['slowest_query_ms']:
+                stats['slowest_query_ms'] = slowest_ms * 1000
+                stats['slowest_query'] = slowest_sql[:500]
+            bucket = next((i for i, bound in enumerate(DURATION_BUCKETS) if total_ms <= bound), len(DURATION_BUCKETS))
+            stats['histogram'][bucket] += 1
+
+    def snapshot(self):
+        with self._lock:
+            report = {}
+            for name, stats in self._endpoints.items():
+                requests = stats['requests']
+                report[name] = {
+                    'requests': requests,
+                    'queries_per_request': round(stats['queries'] / requests, 2),
+                    'avg_sql_ms': round(stats['sql_ms'] / requests, 3),
+                    'avg_render_ms': round(stats['render_ms'] / requests, 3),
+                    'avg_serialize_ms': round(stats['serialize_ms'] / requests, 3),
+                    'avg_total_ms': round(stats['total_ms'] / requests, 3),
+                    'slowest_query_ms': round(stats['slowest_query_ms'], 3),
+                    'slowest_query': stats['slowest_query'],
+                    'histogram_ms': {
+                        **{f"le_{bound}": count for bound, count in zip(DURATION_BUCKETS, stats['histogram'])},
+                        'inf': stats['histogram'][-1],
+                    },
+                }
+            return report
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+
+endpoint_metrics = EndpointMetrics()
@@ -0,0 +1,75 @@
+import json
+from importlib import import_module
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_databases, teardown_databases
+
+from benchmarks import SUITES
+from benchmarks.harness import compare, environment
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a benchmark suite against a throwaway test database and optionally save the "
+        "results as a baseline or compare them with a previous one."
+    )
+
+    def add_arguments(self, parser):
+        subparsers = parser.add_subparsers(dest='suite', required=True)
+        for name, module in SUITES.items():
+            suite = import_module(module)
+            subparser = subparsers.add_parser(name, help=(suite.__doc__ or '').strip().splitlines()[0])
+            subparser.add_argument('--output', help="Write the results to this JSON file.")
+            subparser.add_argument('--compare', help="Baseline JSON file to compare the results with.")
+            subparser.add_argument('--tolerance', type=float, default=0.2,
+                                   help="Allowed relative p95 slowdown before reporting a regression.")
+            subparser.add_argument('--keepdb', action='store_true', help="Reuse the test database.")
+            suite.add_arguments(subparser)
+
+    def handle(self, *args, **options):
+        suite = import_module(SUITES[options['suite']])
+
+        old_config = None
+        if not options.get('url'):
+            old_config = setup_databases(verbosity=0, interactive=False, keepdb=options['keepdb'])
+        try:
+            results = suite.run(options, self.stdout)
+            report = {
+                'suite': options['suite'],
+                'environment': environment(),
+                'parameters': {
+                    key: value for key, value in options.items()
+                    if key not in ('output', 'compare', 'tolerance', 'keepdb', 'suite', 'verbosity',
+                                   'settings', 'pythonpath', 'traceback', 'no_color', 'force_color',
+                                   'skip_checks')
+                },
+                'results': results,
+            }
+        finally:
+            if old_config is not None:
+                teardown_databases(old_config, verbosity=0, keepdb=options['keepdb'])
+
+        self.print_table(results)
+
+        if options['output']:
+            path = Path(options['output'])
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(report, indent=2) + '\n')
+            self.stdout.write(f"Saved results to {path}")
+
+        if options['compare']:
+            baseline = json.loads(Path(options['compare']).read_text())
+            if baseline.get('parameters', {}).get('transport') != options.get('transport'):
+                self.stderr.write("Warning: the baseline was recorded with a different transport.")
+            regressions = compare(results, baseline, options['tolerance'])
+            if regressions:
+                raise CommandError("Regressions against baseline:\n  " + "\n  ".join(regressions))
+            self.stdout.write(self.style.SUCCESS("No regressions against baseline."))
+
+    def print_table(self, results):
+        columns = ['count', 'p50_ms', 'p95_ms', 'p99_ms', 'rps', 'queries_per_request']
+        width = max(len(name) for name in results) if results else 10
+        self.stdout.write(f"{'operation':<{width}}  " + "  ".join(f"{c:>19}" for c in columns))
+        for name, row in results.items():
+            self.stdout.write(f"{name:<{width}}  " + "  ".join(f"{str(row[c]):>19}" for c in columns))
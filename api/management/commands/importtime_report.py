@@ -0,0 +1,133 @@
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# What a cold serverless invocation does before its first query: import the
+# WSGI application and resolve a URL.
+STARTUP_SCRIPT = (
+    "import time; started = time.perf_counter(); "
+    "import fitness_backend.wsgi; "
+    "from django.urls import resolve; resolve('/api/activities/'); "
+    "print(time.perf_counter() - started)"
+)
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+\d+ \|\s+(\S+)$')
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure process start-up with `python -X importtime` in cold-start and full mode, "
+        "report the costliest packages and modules, and track the totals over time in a history file."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', choices=['cold', 'full', 'both'], default='both',
+                            help="COLD_START_MODE setting to measure.")
+        parser.add_argument('--repeat', type=int, default=3,
+                            help="Start-ups measured per mode; the median is reported.")
+        parser.add_argument('--top', type=int, default=10, help="Packages and modules listed per mode.")
+        parser.add_argument('--history', help="JSON lines file to append the totals to and compare with.")
+        parser.add_argument('--tolerance', type=float, default=0.2,
+                            help="Allowed relative slowdown against the previous history entry.")
+
+    def handle(self, *args, **options):
+        modes = ['cold', 'full'] if options['mode'] == 'both' else [options['mode']]
+        entries = [self.measure(mode, options['repeat']) for mode in modes]
+        for entry in entries:
+            self.print_entry(entry, options['top'])
+
+        if options['history']:
+            self.track(entries, Path(options['history']), options['tolerance'])
+
+    def measure(self, mode, repeat):
+        env = {
+            **os.environ,
+            'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'fitness_backend.settings'),
+            'COLD_START_MODE': 'true' if mode == 'cold' else 'false',
+        }
+        runs = []
+        for _ in range(repeat):
+            process = subprocess.run(
+                [sys.executable, '-X', 'importtime', '-c', STARTUP_SCRIPT],
+                cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+            )
+            if process.returncode != 0:
+                raise CommandError(f"Start-up in {mode} mode failed:\n{process.stderr[-2000:]}")
+            runs.append((float(process.stdout.strip().splitlines()[-1]), parse_importtime(process.stderr)))
+
+        runs.sort(key=lambda run: run[0])
+        wall, modules = runs[len(runs) // 2]
+        packages = Counter()
+        for name, self_us in modules.items():
+            packages[name.split('.')[0]] += self_us
+        return {
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'mode': mode,
+            'python': platform.python_version(),
+            'startup_ms': round(wall * 1000, 1),
+            'startup_runs_ms': [round(run[0] * 1000, 1) for run in runs],
+            'import_ms': round(sum(modules.values()) / 1000, 1),
+            'modules': len(modules),
+            'packages_ms': {name: round(us / 1000, 1) for name, us in packages.most_common()},
+            'slowest_modules_ms': {
+                name: round(us / 1000, 1)
+                for name, us in sorted(modules.items(), key=lambda item: item[1], reverse=True)[:25]
+            },
+        }
+
+    def print_entry(self, entry, top):
+        self.stdout.write(
+            f"{entry['mode']} start-up: {entry['startup_ms']}ms (median of {entry['startup_runs_ms']}), "
+            f"{entry['modules']} modules imported in {entry['import_ms']}ms"
+        )
+        self.stdout.write("  packages by self time:")
+        for name, ms in list(entry['packages_ms'].items())[:top]:
+            self.stdout.write(f"    {ms:>8}ms  {name}")
+        self.stdout.write("  slowest modules:")
+        for name, ms in list(entry['slowest_modules_ms'].items())[:top]:
+            self.stdout.write(f"    {ms:>8}ms  {name}")
+
+    def track(self, entries, path, tolerance):
+        previous = {}
+        if path.exists():
+            for line in path.read_text().splitlines():
+                if line.strip():
+                    record = json.loads(line)
+                    previous[record['mode']] = record
+
+        regressions = []
+        for entry in entries:
+            last = previous.get(entry['mode'])
+            if last:
+                self.stdout.write(
+                    f"{entry['mode']}: {last['startup_ms']}ms on {last['timestamp']} -> {entry['startup_ms']}ms now"
+                )
+                if entry['startup_ms'] > last['startup_ms'] * (1 + tolerance):
+                    regressions.append(f"{entry['mode']}: start-up {last['startup_ms']}ms -> {entry['startup_ms']}ms")
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open('a') as history:
+            for entry in entries:
+                history.write(json.dumps(entry) + '\n')
+        self.stdout.write(f"Appended to {path}")
+
+        if regressions:
+            raise CommandError("Start-up regressions:\n  " + "\n  ".join(regressions))
+
+
+def parse_importtime(stderr):
+    """Self time in microseconds per imported module from `-X importtime` output."""
+    modules = {}
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            modules[match.group(2)] = modules.get(match.group(2), 0) + int(match.group(1))
+    return modules
@@ -0,0 +1,40 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from api.models import ActivityTombstone
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete activity tombstones older than ACTIVITY_TOMBSTONE_RETENTION_DAYS in batches. "
+        "Clients that last synced before that get a full resync. Meant to run daily from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help="Rows deleted per transaction.")
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Only report how many tombstones would be deleted.")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=settings.ACTIVITY_TOMBSTONE_RETENTION_DAYS)
+        expired = ActivityTombstone.objects.filter(deleted_at__lt=cutoff)
+
+        if options['dry_run']:
+            self.stdout.write(f"{expired.count()} tombstones would be deleted.")
+            return
+
+        deleted = 0
+        while True:
+            ids = list(expired.order_by('id').values_list('id', flat=True)[:options['batch_size']])
+            if not ids:
+                break
+            with transaction.atomic():
+                ActivityTombstone.objects.filter(id__in=ids).delete()
+            deleted += len(ids)
+
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired tombstones."))
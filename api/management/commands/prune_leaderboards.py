@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.models import LeaderboardScore
+from api.services import oldest_leaderboard_week
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete leaderboard scores of weeks older than LEADERBOARD_RETENTION_WEEKS in batches. "
+        "Meant to run daily from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help="Rows deleted per transaction.")
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Only report how many scores would be deleted.")
+
+    def handle(self, *args, **options):
+        expired = LeaderboardScore.objects.filter(period_start__lt=oldest_leaderboard_week())
+
+        if options['dry_run']:
+            self.stdout.write(f"{expired.count()} leaderboard scores would be deleted.")
+            return
+
+        deleted = 0
+        while True:
+            ids = list(expired.order_by('id').values_list('id', flat=True)[:options['batch_size']])
+            if not ids:
+                break
+            with transaction.atomic():
+                LeaderboardScore.objects.filter(id__in=ids).delete()
+            deleted += len(ids)
+
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired leaderboard scores."))
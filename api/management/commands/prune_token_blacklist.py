@@ -0,0 +1,41 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired outstanding refresh tokens and their blacklist entries in batches. "
+        "Meant to run on a schedule, e.g. hourly from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help="Rows deleted per transaction.")
+        parser.add_argument('--grace', type=int, default=0,
+                            help="Keep tokens for this many seconds after they expire.")
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Only report how many tokens would be deleted.")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(seconds=options['grace'])
+        expired = OutstandingToken.objects.filter(expires_at__lt=cutoff)
+
+        if options['dry_run']:
+            self.stdout.write(f"{expired.count()} expired tokens would be deleted.")
+            return
+
+        deleted = 0
+        while True:
+            ids = list(expired.order_by('id').values_list('id', flat=True)[:options['batch_size']])
+            if not ids:
+                break
+            with transaction.atomic():
+                # Cascades to BlacklistedToken
+                OutstandingToken.objects.filter(id__in=ids).delete()
+            deleted += len(ids)
+
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired tokens."))
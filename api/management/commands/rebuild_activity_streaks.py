@@ -0,0 +1,60 @@
+from itertools import groupby
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.models import Activity, StreakRun
+from api.services import group_runs, lock_users
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Rebuild the StreakRun table from completed Activity rows, a batch of users at a time."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='users',
+                            help="Only rebuild this user id (may be repeated).")
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help="Number of users rebuilt per transaction.")
+
+    def handle(self, *args, **options):
+        users = User.objects.order_by('id').values_list('id', flat=True)
+        if options['users']:
+            users = users.filter(id__in=options['users'])
+
+        batch_size = options['batch_size']
+        rebuilt = 0
+        batch = []
+        for user_id in users.iterator(chunk_size=batch_size):
+            batch.append(user_id)
+            if len(batch) == batch_size:
+                rebuilt += self.rebuild(batch)
+                batch = []
+        if batch:
+            rebuilt += self.rebuild(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rebuilt} streak runs."))
+
+    def rebuild(self, user_ids):
+        # Lock the users before reading their days, as the live streak updates
+        # do, so an activity committed mid-rebuild is not lost from the runs.
+        with transaction.atomic():
+            lock_users(user_ids)
+            days = (
+                Activity.objects
+                .filter(user_id__in=user_ids, status='completed')
+                .values_list('user_id', 'activity_type', 'date')
+                .distinct()
+                .order_by('user_id', 'activity_type', 'date')
+            )
+            runs = [
+                StreakRun(user_id=user_id, activity_type=activity_type, start_date=start, end_date=end,
+                          length=(end - start).days + 1)
+                for (user_id, activity_type), rows in groupby(days.iterator(), key=lambda row: row[:2])
+                for start, end in group_runs(row[2] for row in rows)
+            ]
+            StreakRun.objects.filter(user_id__in=user_ids).delete()
+            created = StreakRun.objects.bulk_create(runs, batch_size=1000)
+        return len(created)
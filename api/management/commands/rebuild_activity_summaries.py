@@ -0,0 +1,51 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from api.models import Activity, DailyActivitySummary
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Rebuild the DailyActivitySummary table from Activity rows, a batch of users at a time."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='users',
+                            help="Only rebuild this user id (may be repeated).")
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help="Number of users rebuilt per transaction.")
+
+    def handle(self, *args, **options):
+        users = User.objects.order_by('id').values_list('id', flat=True)
+        if options['users']:
+            users = users.filter(id__in=options['users'])
+
+        batch_size = options['batch_size']
+        rebuilt = 0
+        batch = []
+        for user_id in users.iterator(chunk_size=batch_size):
+            batch.append(user_id)
+            if len(batch) == batch_size:
+                rebuilt += self.rebuild(batch)
+                batch = []
+        if batch:
+            rebuilt += self.rebuild(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rebuilt} summary rows."))
+
+    def rebuild(self, user_ids):
+        rows = (
+            Activity.objects
+            .filter(user_id__in=user_ids)
+            .values('user_id', 'date', 'activity_type', 'status')
+            .annotate(count=Count('id'))
+            .order_by()
+        )
+        with transaction.atomic():
+            DailyActivitySummary.objects.filter(user_id__in=user_ids).delete()
+            created = DailyActivitySummary.objects.bulk_create(
+                (DailyActivitySummary(**row) for row in rows), batch_size=1000,
+            )
+        return len(created)
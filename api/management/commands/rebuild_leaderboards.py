@@ -0,0 +1,73 @@
+from collections import Counter
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from api.models import Activity, LeaderboardScore
+from api.services import lock_users, oldest_leaderboard_week, week_start
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Recompute the leaderboard scores of the retained weeks from Activity rows, a batch of users at a time."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--week', type=date.fromisoformat, action='append', dest='weeks',
+                            help="Only rebuild the week containing this YYYY-MM-DD date (may be repeated).")
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help="Number of users rebuilt per transaction.")
+
+    def handle(self, *args, **options):
+        oldest = oldest_leaderboard_week()
+        if options['weeks']:
+            weeks = sorted({week_start(day) for day in options['weeks']})
+        else:
+            weeks = [oldest + timedelta(weeks=n) for n in range((week_start(date.today()) - oldest).days // 7 + 1)]
+        # Expired weeks stay out; prune_leaderboards removes them.
+        weeks = [period_start for period_start in weeks if period_start >= oldest]
+
+        batch_size = options['batch_size']
+        rebuilt = 0
+        batch = []
+        if weeks:
+            for user_id in User.objects.order_by('id').values_list('id', flat=True).iterator(chunk_size=batch_size):
+                batch.append(user_id)
+                if len(batch) == batch_size:
+                    rebuilt += self.rebuild(batch, weeks)
+                    batch = []
+            if batch:
+                rebuilt += self.rebuild(batch, weeks)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rebuilt} leaderboard scores."))
+
+    def rebuild(self, user_ids, weeks):
+        # Lock the users before counting, as the live score updates do, so an
+        # activity committed mid-rebuild is not lost from the scores.
+        with transaction.atomic():
+            lock_users(user_ids)
+            rows = (
+                Activity.objects
+                .filter(user_id__in=user_ids, status='completed',
+                        date__gte=weeks[0], date__lt=weeks[-1] + timedelta(days=7))
+                .values_list('user_id', 'activity_type', 'date')
+                .annotate(count=Count('id'))
+                .order_by()
+            )
+            scores = Counter()
+            for user_id, activity_type, day, count in rows.iterator():
+                scores[(week_start(day), activity_type, user_id)] += count
+
+            LeaderboardScore.objects.filter(user_id__in=user_ids, period_start__in=weeks).delete()
+            created = LeaderboardScore.objects.bulk_create(
+                (
+                    LeaderboardScore(period_start=period_start, activity_type=activity_type, user_id=user_id,
+                                     score=score)
+                    for (period_start, activity_type, user_id), score in scores.items()
+                    if period_start in weeks
+                ),
+                batch_size=1000,
+            )
+        return len(created)
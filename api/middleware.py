@@ -0,0 +1,354 @@
+import time
+from contextlib import ExitStack, contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils.cache import patch_vary_headers
+from django.utils.module_loading import import_string
+
+from .compression import available_codecs, negotiate
+from .db_routers import set_pinned, unpin
+from .instrumentation import QueryRecorder, endpoint_metrics
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Records query count, SQL time, the slowest statement, serialization and
+    render time per resolved URL name, and reports them in a Server-Timing
+    header.
+
+    Render time runs from process_template_response() to the end of the
+    response, so it is the renderer's work; keep this middleware last in
+    MIDDLEWARE so it covers nothing else. Views that turn rows into response
+    data themselves report that step through timed_serialization().
+
+    Queries run while a streaming response (an export) is consumed happen
+    after the view returns. They are recorded too, together with the
+    streaming time, once the stream ends; the Server-Timing header has been
+    sent by then and only covers the part before the body.
+
+    Enabled with QUERY_INSTRUMENTATION; otherwise it removes itself from the
+    middleware chain at startup.
+    """
+
+    def __init__(self, get_response):
+        if not settings.QUERY_INSTRUMENTATION:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        request._render_started = None
+        request._serialize_time = 0.0
+        start = time.perf_counter()
+        with recording_queries(recorder):
+            response = self.get_response(request)
+        end = time.perf_counter()
+
+        render = end - request._render_started if request._render_started else 0.0
+        match = request.resolver_match
+        name = match.view_name if match else 'unresolved'
+
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={recorder.total * 1000:.3f};desc="{recorder.count} queries"',
+            f'serialize;dur={request._serialize_time * 1000:.3f}',
+            f'render;dur={render * 1000:.3f}',
+            f'total;dur={(end - start) * 1000:.3f}',
+        ])
+
+        def record():
+            endpoint_metrics.record(name, time.perf_counter() - start, recorder, render, request._serialize_time)
+
+        if not response.streaming:
+            record()
+        elif response.is_async:
+            response.streaming_content = self.record_async_stream(response.streaming_content, recorder, record)
+        else:
+            response.streaming_content = self.record_stream(response.streaming_content, recorder, record)
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered right after this hook returns.
+        request._render_started = time.perf_counter()
+        return response
+
+    @staticmethod
+    def record_stream(chunks, recorder, record):
+        # The server may pull chunks from another thread than the one that ran
+        # the view, so the wrappers are installed around each step.
+        chunks = iter(chunks)
+        done = object()
+        try:
+            while True:
+                with recording_queries(recorder):
+                    chunk = next(chunks, done)
+                if chunk is done:
+                    break
+                yield chunk
+        finally:
+            record()
+
+    @staticmethod
+    async def record_async_stream(chunks, recorder, record):
+        # Connections are per thread: the async ORM queries from the event
+        # loop, and sync iterators advanced with sync_to_async (exports under
+        # ASGI) from the request's thread, so both threads' are watched.
+        threaded = ExitStack()
+        try:
+            await sync_to_async(threaded.enter_context)(recording_queries(recorder))
+            with recording_queries(recorder):
+                async for chunk in chunks:
+                    yield chunk
+        finally:
+            threaded.close()
+            record()
+
+
+@contextmanager
+def recording_queries(recorder):
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        yield
+
+
+class AdminOnlyMiddleware:
+    """
+    Run the ADMIN_MIDDLEWARE chain (sessions, CSRF, auth, messages,
+    clickjacking) only for paths under ADMIN_PATH_PREFIXES.
+
+    The JWT-authenticated API needs none of it, so every other request goes
+    straight to the rest of MIDDLEWARE. Django only calls view, template
+    response and exception hooks on middleware listed in MIDDLEWARE, so this
+    class forwards them to the wrapped middleware for admin requests;
+    CsrfViewMiddleware does its checking in process_view().
+
+    Sync and async capable, like Django's MiddlewareMixin. Under ASGI the
+    hooks are async too, since Django would otherwise run them in a thread
+    for every request; only admin requests hop to a thread, to run the
+    wrapped middleware's sync hooks.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.prefixes = tuple(settings.ADMIN_PATH_PREFIXES)
+
+        # MiddlewareMixin-based middleware follows the mode of its handler,
+        # so the admin chain is async when the rest of the chain is.
+        handler = get_response
+        chain = []
+        for path in reversed(settings.ADMIN_MIDDLEWARE):
+            middleware = import_string(path)(handler)
+            chain.insert(0, middleware)
+            handler = middleware
+        self.admin_handler = handler
+
+        # Same order as django.core.handlers.base.BaseHandler.load_middleware()
+        self.view_hooks = [m.process_view for m in chain if hasattr(m, 'process_view')]
+        self.template_response_hooks = [
+            m.process_template_response for m in reversed(chain) if hasattr(m, 'process_template_response')
+        ]
+        self.exception_hooks = [m.process_exception for m in reversed(chain) if hasattr(m, 'process_exception')]
+
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+            self.process_view = self.aprocess_view
+            self.process_template_response = self.aprocess_template_response
+            self.process_exception = self.aprocess_exception
+
+    def is_admin(self, request):
+        return request.path_info.startswith(self.prefixes)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if self.is_admin(request):
+            return self.admin_handler(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        if self.is_admin(request):
+            return await self.admin_handler(request)
+        return await self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if self.is_admin(request):
+            return self.run_view_hooks(request, view_func, view_args, view_kwargs)
+        return None
+
+    def process_template_response(self, request, response):
+        if self.is_admin(request):
+            return self.run_template_response_hooks(request, response)
+        return response
+
+    def process_exception(self, request, exception):
+        if self.is_admin(request):
+            return self.run_exception_hooks(request, exception)
+        return None
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        if self.is_admin(request):
+            return await sync_to_async(self.run_view_hooks)(request, view_func, view_args, view_kwargs)
+        return None
+
+    async def aprocess_template_response(self, request, response):
+        if self.is_admin(request):
+            return await sync_to_async(self.run_template_response_hooks)(request, response)
+        return response
+
+    async def aprocess_exception(self, request, exception):
+        if self.is_admin(request):
+            return await sync_to_async(self.run_exception_hooks)(request, exception)
+        return None
+
+    def run_view_hooks(self, request, view_func, view_args, view_kwargs):
+        for hook in self.view_hooks:
+            response = hook(request, view_func, view_args, view_kwargs)
+            if response is not None:
+                return response
+        return None
+
+    def run_template_response_hooks(self, request, response):
+        for hook in self.template_response_hooks:
+            response = hook(request, response)
+        return response
+
+    def run_exception_hooks(self, request, exception):
+        for hook in self.exception_hooks:
+            response = hook(request, exception)
+            if response is not None:
+                return response
+        return None
+
+
+class PrimaryDatabaseMiddleware:
+    """
+    Scope primary pinning to the request: every read of a writing request goes
+    to the primary, so objects are never loaded from a lagging replica and
+    saved back, and pins set later in the request (e.g. by authentication
+    after a recent write) end with it.
+
+    Sync and async capable, like Django's MiddlewareMixin, so an ASGI
+    request chain is not adapted to a thread at this point. The pin is a
+    context variable, which sync_to_async carries into the view's thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = set_pinned(request.method not in SAFE_METHODS)
+        try:
+            return self.get_response(request)
+        finally:
+            unpin(token)
+
+    async def __acall__(self, request):
+        token = set_pinned(request.method not in SAFE_METHODS)
+        try:
+            return await self.get_response(request)
+        finally:
+            unpin(token)
+
+
+class CompressionMiddleware:
+    """
+    Compress the responses of RESPONSE_COMPRESSION_VIEWS with the best
+    encoding both sides support (zstd, br or gzip, see api.compression).
+
+    Buffered bodies smaller than RESPONSE_COMPRESSION_MIN_SIZE, or that do
+    not shrink, are sent as is. Streaming bodies (exports) are compressed
+    chunk by chunk as they are produced. Strong ETags are weakened, as
+    Django's GZipMiddleware does, since the bytes now depend on the encoding.
+
+    Sync and async capable, like Django's MiddlewareMixin, so an ASGI
+    request chain is not adapted to a thread at this point.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.RESPONSE_COMPRESSION:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        self.codecs = available_codecs()
+        self.view_names = set(settings.RESPONSE_COMPRESSION_VIEWS)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def process_response(self, request, response):
+        match = request.resolver_match
+        if match is None or match.view_name not in self.view_names:
+            return response
+
+        patch_vary_headers(response, ['Accept-Encoding'])
+        if response.status_code != 200 or response.has_header('Content-Encoding'):
+            return response
+        codec = negotiate(request.headers.get('Accept-Encoding', ''), self.codecs)
+        if codec is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = self.compress_async_stream(response.streaming_content, codec)
+            else:
+                response.streaming_content = self.compress_stream(response.streaming_content, codec)
+            # Only set when the stream length was known up front.
+            del response['Content-Length']
+        else:
+            if len(response.content) < settings.RESPONSE_COMPRESSION_MIN_SIZE:
+                return response
+            compressed = codec.compress(response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = codec.name
+        return response
+
+    @staticmethod
+    def compress_stream(chunks, codec):
+        compressor = codec.compressor()
+        for chunk in chunks:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
+
+    @staticmethod
+    async def compress_async_stream(chunks, codec):
+        compressor = codec.compressor()
+        async for chunk in chunks:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
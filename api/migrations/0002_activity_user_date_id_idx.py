@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-17 02:11
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='activity',
+            index=models.Index(fields=['user', '-date', '-id'], name='activity_user_date_id_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-17 02:38
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_dailyactivitysummary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='activity',
+            index=models.Index(fields=['user', 'activity_type', 'date'], name='activity_user_type_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='activity',
+            index=models.Index(fields=['user', 'status', 'date'], name='activity_user_status_date_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-17 03:05
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_activity_sync'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='activity',
+            name='calories',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='activity',
+            name='distance_km',
+            field=models.FloatField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(0)]),
+        ),
+        migrations.AddField(
+            model_name='activity',
+            name='duration_minutes',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='activity',
+            name='steps',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.7 on 2026-10-17 03:08
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_activity_metrics'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StreakRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('activity_type', models.CharField(choices=[('workout', 'Workout'), ('meal', 'Meal'), ('steps', 'Steps')], max_length=20)),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField()),
+                ('length', models.PositiveIntegerField()),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='streak_runs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'activity_type', 'end_date'], name='streak_run_user_type_end_idx'), models.Index(fields=['user', 'activity_type', '-length'], name='streak_run_user_type_len_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'activity_type', 'start_date'), name='streak_run_user_type_start_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='WeeklyGoal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('activity_type', models.CharField(choices=[('workout', 'Workout'), ('meal', 'Meal'), ('steps', 'Steps')], max_length=20)),
+                ('target', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='weekly_goals', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'activity_type'), name='weekly_goal_user_type_uniq')],
+            },
+        ),
+    ]
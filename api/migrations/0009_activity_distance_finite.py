@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-17 03:25
+
+import api.models
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_leaderboards'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='activity',
+            name='distance_km',
+            field=models.FloatField(blank=True, null=True, validators=[api.models.validate_finite, django.core.validators.MinValueValidator(0)]),
+        ),
+    ]
@@ -0,0 +1,56 @@
+"""
+Fill StreakRun (0007) from the existing completed activities.
+
+The table is maintained incrementally by api.services from the moment it
+exists, so without this step users with history before it would start with
+zero streaks. It is recomputed from scratch, the same way as the
+rebuild_activity_streaks command; running it on an up-to-date table changes
+nothing.
+"""
+from datetime import timedelta
+from itertools import groupby
+
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+
+def consecutive_runs(days):
+    runs = []
+    for day in days:
+        if runs and day - runs[-1][1] <= timedelta(days=1):
+            runs[-1][1] = day
+        else:
+            runs.append([day, day])
+    return runs
+
+
+def backfill_streak_runs(apps, schema_editor):
+    db = schema_editor.connection.alias
+    Activity = apps.get_model('api', 'Activity')
+    StreakRun = apps.get_model('api', 'StreakRun')
+    days = (
+        Activity.objects.using(db)
+        .filter(status='completed')
+        .values_list('user_id', 'activity_type', 'date')
+        .distinct()
+        .order_by('user_id', 'activity_type', 'date')
+    )
+    StreakRun.objects.using(db).all().delete()
+    StreakRun.objects.using(db).bulk_create((
+        StreakRun(user_id=user_id, activity_type=activity_type, start_date=start, end_date=end,
+                  length=(end - start).days + 1)
+        for (user_id, activity_type), rows in groupby(days.iterator(), key=lambda row: row[:2])
+        for start, end in consecutive_runs(row[2] for row in rows)
+    ), batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_activity_distance_finite'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_streak_runs, migrations.RunPython.noop, elidable=True),
+    ]
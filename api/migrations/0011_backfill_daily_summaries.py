@@ -0,0 +1,40 @@
+"""
+Fill DailyActivitySummary (0003) from the existing activities.
+
+The table is maintained incrementally by api.services from the moment it
+exists, so without this step users with history before it would start with
+empty calendars and goal progress. It is recomputed from scratch, the same
+way as the rebuild_activity_summaries command; running it on an up-to-date
+table changes nothing.
+"""
+from django.db import migrations
+from django.db.models import Count
+
+BATCH_SIZE = 1000
+
+
+def backfill_daily_summaries(apps, schema_editor):
+    db = schema_editor.connection.alias
+    Activity = apps.get_model('api', 'Activity')
+    DailyActivitySummary = apps.get_model('api', 'DailyActivitySummary')
+    rows = (
+        Activity.objects.using(db)
+        .values('user_id', 'date', 'activity_type', 'status')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+    DailyActivitySummary.objects.using(db).all().delete()
+    DailyActivitySummary.objects.using(db).bulk_create(
+        (DailyActivitySummary(**row) for row in rows.iterator()), batch_size=BATCH_SIZE,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_backfill_streak_runs'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_daily_summaries, migrations.RunPython.noop, elidable=True),
+    ]
@@ -0,0 +1,55 @@
+"""
+Fill LeaderboardScore (0008) from the existing completed activities.
+
+The table is maintained incrementally by api.services from the moment it
+exists, so without this step the current leaderboards would only count
+activities written after it. The retained weeks are recomputed from
+scratch, the same way as the rebuild_leaderboards command; running it on an
+up-to-date table changes nothing.
+"""
+from collections import Counter
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import migrations
+from django.db.models import Count
+
+BATCH_SIZE = 1000
+
+
+def week_start(day):
+    return day - timedelta(days=day.weekday())
+
+
+def backfill_leaderboard_scores(apps, schema_editor):
+    db = schema_editor.connection.alias
+    Activity = apps.get_model('api', 'Activity')
+    LeaderboardScore = apps.get_model('api', 'LeaderboardScore')
+    # Only the weeks api.services still keeps, see LEADERBOARD_RETENTION_WEEKS.
+    oldest = week_start(date.today()) - timedelta(weeks=settings.LEADERBOARD_RETENTION_WEEKS - 1)
+    rows = (
+        Activity.objects.using(db)
+        .filter(status='completed', date__gte=oldest)
+        .values('user_id', 'activity_type', 'date')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+    scores = Counter()
+    for row in rows.iterator():
+        scores[(week_start(row['date']), row['activity_type'], row['user_id'])] += row['count']
+    LeaderboardScore.objects.using(db).all().delete()
+    LeaderboardScore.objects.using(db).bulk_create((
+        LeaderboardScore(period_start=period_start, activity_type=activity_type, user_id=user_id, score=score)
+        for (period_start, activity_type, user_id), score in scores.items()
+    ), batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_backfill_daily_summaries'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_leaderboard_scores, migrations.RunPython.noop, elidable=True),
+    ]
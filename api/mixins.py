@@ -0,0 +1,116 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from rest_framework.response import Response
+
+from .cache import response_cache_enabled, response_cache_key
+from .serializers import ActivityRepresentationQuerySerializer
+
+
+class ConditionalGetMixin:
+    """
+    Answer If-None-Match / If-Modified-Since with 304 before any rows are
+    serialized.
+
+    Views implement `get_validators(request, *args, **kwargs)` returning an
+    `(etag, last_modified)` pair computed from a cheap query; either may be
+    None. Returning `(None, None)` skips the conditional handling, e.g. when
+    the object does not exist and the regular 404 path should run.
+    """
+
+    def get(self, request, *args, **kwargs):
+        etag, last_modified = self.get_validators(request, *args, **kwargs)
+        if etag is None and last_modified is None:
+            return super().get(request, *args, **kwargs)
+
+        etag = quote_etag(etag) if etag else None
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        if etag:
+            response['ETag'] = etag
+        if timestamp is not None:
+            response['Last-Modified'] = http_date(timestamp)
+        patch_vary_headers(response, ['Authorization'])
+        return response
+
+    def get_validators(self, request, *args, **kwargs):
+        raise NotImplementedError('ConditionalGetMixin requires get_validators()')
+
+    def make_etag(self, request, *parts):
+        # The query string and rendered format change the body, so they are
+        # part of the validator along with the data fingerprint.
+        key = [request.user.pk, request.get_full_path(), request.accepted_renderer.format, *parts]
+        return hashlib.md5(':'.join(map(str, key)).encode()).hexdigest()
+
+
+class CachedResponseMixin:
+    """
+    Serve successful GET responses from the per-user response cache.
+
+    Place it before ConditionalGetMixin so that a cache hit can also answer
+    conditional requests without touching the database.
+    """
+    cache_namespace = None
+    cached_headers = ('ETag', 'Last-Modified')
+
+    def get(self, request, *args, **kwargs):
+        if not response_cache_enabled():
+            return super().get(request, *args, **kwargs)
+
+        key = response_cache_key(request, self.cache_namespace)
+        cached = cache.get(key)
+        if cached is not None:
+            return self.cached_response(request, cached)
+
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == 200 and isinstance(response, Response):
+            headers = {name: response[name] for name in self.cached_headers if name in response}
+            cache.set(key, {'data': response.data, 'headers': headers},
+                      timeout=settings.ACTIVITY_RESPONSE_CACHE_TIMEOUT)
+        return response
+
+    def cached_response(self, request, cached):
+        headers = cached['headers']
+        last_modified = headers.get('Last-Modified')
+        response = get_conditional_response(
+            request,
+            etag=headers.get('ETag'),
+            last_modified=parse_http_date_safe(last_modified) if last_modified else None,
+        )
+        if response is None:
+            response = Response(cached['data'])
+        for name, value in headers.items():
+            response[name] = value
+        patch_vary_headers(response, ['Authorization'])
+        return response
+
+
+class SparseFieldsMixin:
+    """
+    Parse ?fields= and ?layout= for activity views.
+
+    `get_requested_fields()` returns the requested subset of
+    ActivitySerializer's fields in their declared order, or None when the
+    parameter is absent. Both parameters only apply to GET; writes always
+    load and validate the full object.
+    """
+
+    def get_representation(self):
+        if self.request.method != 'GET':
+            return {'layout': 'objects'}
+        if not hasattr(self, '_representation'):
+            params = ActivityRepresentationQuerySerializer(data=self.request.query_params)
+            params.is_valid(raise_exception=True)
+            self._representation = params.validated_data
+        return self._representation
+
+    def get_requested_fields(self):
+        return self.get_representation().get('fields')
+
+    def is_columnar(self):
+        return self.get_representation()['layout'] == 'columnar'
@@ -1,9 +1,21 @@
+import math
+
+from django.core.exceptions import ValidationError
+from django.core.validators import MinValueValidator
 from django.db import models
 from django.contrib.auth import get_user_model
 
+from .cache import bump_user_version
+
 User = get_user_model()
 
 
+def validate_finite(value):
+    # FloatField accepts "NaN" and "Infinity", which no range validator rejects.
+    if not math.isfinite(value):
+        raise ValidationError("Enter a finite number.", code='invalid')
+
+
 class Activity(models.Model):
     STATUS_CHOICES = [
         ('planned', 'Planned'),
@@ -22,8 +34,158 @@ class Activity(models.Model):
     description = models.TextField(blank=True)
     date = models.DateField()
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='planned')
+    # Optional quantitative metrics, aggregated by api.analytics.
+    duration_minutes = models.PositiveIntegerField(null=True, blank=True)
+    calories = models.PositiveIntegerField(null=True, blank=True)
+    distance_km = models.FloatField(null=True, blank=True, validators=[validate_finite, MinValueValidator(0)])
+    steps = models.PositiveIntegerField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Backs the keyset pagination of the activity list.
+            models.Index(fields=['user', '-date', '-id'], name='activity_user_date_id_idx'),
+            # Back the activity_type / status filters of the activity list.
+            models.Index(fields=['user', 'activity_type', 'date'], name='activity_user_type_date_idx'),
+            models.Index(fields=['user', 'status', 'date'], name='activity_user_status_date_idx'),
+            # Backs the `since` watermark of the delta sync.
+            models.Index(fields=['user', 'updated_at'], name='activity_user_updated_idx'),
+        ]
+
     def __str__(self):
         return f"{self.user.username} - {self.activity_type} ({self.status})"
+
+    def delete(self, *args, **kwargs):
+        # Instead of a post_delete receiver, which would disable fast
+        # queryset deletes (see api.signals).
+        result = super().delete(*args, **kwargs)
+        bump_user_version(self.user_id)
+        return result
+
+
+class DailyActivitySummary(models.Model):
+    """
+    Number of activities per user, day, activity type and status.
+
+    Maintained incrementally by api.services on every write path; rebuild it
+    with `manage.py rebuild_activity_summaries` if it ever drifts.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_summaries')
+    date = models.DateField()
+    activity_type = models.CharField(max_length=20, choices=Activity.ACTIVITY_TYPE_CHOICES)
+    status = models.CharField(max_length=20, choices=Activity.STATUS_CHOICES)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'date', 'activity_type', 'status'],
+                name='daily_summary_user_date_type_status_uniq',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.date} {self.activity_type}/{self.status}: {self.count}"
+
+
+class ActivityTombstone(models.Model):
+    """
+    Deletion log read by the delta sync endpoint, one row per deleted
+    activity.
+
+    Written by api.services on every delete path and pruned after
+    ACTIVITY_TOMBSTONE_RETENTION_DAYS by `manage.py prune_activity_tombstones`.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='activity_tombstones')
+    activity_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'deleted_at'], name='tombstone_user_deleted_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} deleted activity {self.activity_id} at {self.deleted_at}"
+
+
+class StreakRun(models.Model):
+    """
+    A maximal run of consecutive days on which the user completed at least
+    one activity of `activity_type`.
+
+    Runs never overlap or touch. api.services merges and splits them as days
+    gain their first or lose their last completed activity; rebuild them with
+    `manage.py rebuild_activity_streaks` if they ever drift.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='streak_runs')
+    activity_type = models.CharField(max_length=20, choices=Activity.ACTIVITY_TYPE_CHOICES)
+    start_date = models.DateField()
+    end_date = models.DateField()
+    length = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'activity_type', 'start_date'], name='streak_run_user_type_start_uniq',
+            ),
+        ]
+        indexes = [
+            # Neighbour lookups when a day is added or removed, and the current streak.
+            models.Index(fields=['user', 'activity_type', 'end_date'], name='streak_run_user_type_end_idx'),
+            # The longest streak.
+            models.Index(fields=['user', 'activity_type', '-length'], name='streak_run_user_type_len_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.activity_type}: {self.start_date} - {self.end_date}"
+
+
+class WeeklyGoal(models.Model):
+    """Target number of completed activities of a type per Monday-based week."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='weekly_goals')
+    activity_type = models.CharField(max_length=20, choices=Activity.ACTIVITY_TYPE_CHOICES)
+    target = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'activity_type'], name='weekly_goal_user_type_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.activity_type}: {self.target}/week"
+
+
+class LeaderboardScore(models.Model):
+    """
+    Completed activities of a type per user and Monday-based week, ranked by
+    the leaderboard endpoint.
+
+    Maintained incrementally by api.services. Weeks older than
+    LEADERBOARD_RETENTION_WEEKS are neither updated nor kept: `manage.py
+    prune_leaderboards` expires them and `manage.py rebuild_leaderboards`
+    recomputes the retained ones.
+    """
+    period_start = models.DateField()
+    activity_type = models.CharField(max_length=20, choices=Activity.ACTIVITY_TYPE_CHOICES)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='leaderboard_scores')
+    score = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['period_start', 'activity_type', 'user'], name='leaderboard_period_type_user_uniq',
+            ),
+        ]
+        indexes = [
+            # Top-N in rank order, and the count of users ahead of a score.
+            models.Index(
+                fields=['period_start', 'activity_type', '-score', 'user'], name='leaderboard_rank_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.period_start} {self.activity_type} {self.user_id}: {self.score}"
@@ -0,0 +1,116 @@
+import base64
+import binascii
+from datetime import date
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class ActivityCursorPagination(BasePagination):
+    """
+    Keyset pagination over (date, id), newest first.
+
+    The cursor is an opaque token encoding the (date, id) of the last row on
+    the previous page, so every page is a single indexed range scan no matter
+    how deep the client has paged. Pagination is opt-in: requests without a
+    `cursor` or `page_size` parameter keep the legacy unpaginated list.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    ordering = ('-date', '-id')
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_page_size(self, request):
+        default = getattr(settings, 'ACTIVITY_PAGE_SIZE', 50)
+        maximum = getattr(settings, 'ACTIVITY_MAX_PAGE_SIZE', 500)
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, default))
+        except (TypeError, ValueError):
+            size = default
+        if size <= 0:
+            size = default
+        return min(size, maximum)
+
+    def is_requested(self, request):
+        params = request.query_params
+        return self.cursor_query_param in params or self.page_size_query_param in params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_requested(request):
+            return None
+        return self.set_page(list(self.get_page_queryset(queryset, request)))
+
+    def get_page_queryset(self, queryset, request):
+        """
+        Narrow the queryset to the requested page without evaluating it, so
+        async views can fetch the rows themselves and pass them to set_page().
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+
+        position = self.decode_cursor(request)
+        queryset = queryset.order_by(*self.ordering)
+        if position is not None:
+            last_date, last_id = position
+            queryset = queryset.filter(Q(date__lt=last_date) | Q(date=last_date, id__lt=last_id))
+
+        # Fetch one extra row to find out whether another page exists.
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, rows, position=None):
+        """
+        `position` maps a row to its (date, id); by default rows are model
+        instances, but the lean list path passes `.values_list()` tuples.
+        """
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        if self.page:
+            last = self.page[-1]
+            self.last_position = position(last) if position else (last.date, last.id)
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.page_size_query_param, self.page_size)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(*self.last_position))
+
+    def get_previous_link(self):
+        return None
+
+    def encode_cursor(self, last_date, last_id):
+        raw = f"{last_date.isoformat()}|{last_id}".encode('ascii')
+        return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            raw = base64.urlsafe_b64decode(padded.encode('ascii')).decode('ascii')
+            last_date, last_id = raw.split('|')
+            return date.fromisoformat(last_date), int(last_id)
+        except (binascii.Error, UnicodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
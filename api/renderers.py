@@ -0,0 +1,120 @@
+import csv
+import io
+import json
+import re
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - msgpack is optional
+    msgpack = None
+
+
+# Numbers in orjson output that Python writes differently: floats below 1e-4
+# or from 1e16 up, which Python puts in exponent form (1e-05, 1e+20) and orjson
+# as 0.00001 and 1e20. A string that merely looks like one only costs a
+# fallback to the json module.
+ORJSON_FLOAT_MISMATCH = re.compile(rb'(?:^|[\[:,])-?(?:\d+(?:\.\d+)?e|0\.0000)')
+
+
+def dumps(data):
+    """
+    Compact UTF-8 JSON bytes, byte-for-byte what DRF's JSONRenderer produces
+    for the same data (no whitespace, non-ASCII left unescaped).
+    """
+    if orjson is not None:
+        try:
+            ret = orjson.dumps(data, default=JSONEncoder().default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+        except TypeError:
+            # orjson rejects some inputs DRF accepts, e.g. non-str dict keys.
+            pass
+        else:
+            if not ORJSON_FLOAT_MISMATCH.search(ret):
+                # JSONRenderer escapes these so the output is also valid JavaScript.
+                return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+    ret = json.dumps(data, cls=JSONEncoder, ensure_ascii=False, separators=(',', ':'))
+    return ret.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029').encode('utf-8')
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Newline-delimited JSON, one object per line.
+
+    Exports stream their rows directly; this renderer only handles the
+    non-streaming responses of the same view, such as errors.
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        rows = data if isinstance(data, list) else [data]
+        return b''.join(dumps(row) + b'\n' for row in rows)
+
+
+class CSVRenderer(BaseRenderer):
+    """
+    Comma-separated values with a header row taken from the first object.
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        rows = data if isinstance(data, list) else [data]
+        if not rows:
+            return b''
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+        return buffer.getvalue().encode(self.charset)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that encodes with orjson when it is installed.
+
+    Output is identical to JSONRenderer in its default compact mode; indented
+    responses (`; indent=` in the Accept header) fall back to the stock
+    renderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        renderer_context = renderer_context or {}
+        if self.get_indent(accepted_media_type, renderer_context) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    MessagePack for clients that opt in with `Accept: application/msgpack`
+    or `?format=msgpack`. Values JSON has no type for (dates, decimals) are
+    encoded as the same strings the JSON renderer produces.
+
+    Requires the optional `msgpack` package; settings only register the
+    renderer when it is installed.
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=JSONEncoder().default)
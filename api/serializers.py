@@ -1,8 +1,16 @@
+from datetime import date, timedelta
+from functools import partial
+
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.db import models
+from django.utils import timezone
 from rest_framework import serializers
 from django.contrib.auth.password_validation import validate_password
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
 
-from api.models import Activity
+from api.models import Activity, WeeklyGoal
+from api.tokens import FilteredBlacklistRefreshToken
 
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
@@ -20,19 +28,251 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         validated_data.pop('password2', None)
+        # The async view hashes in a thread pool and passes the result in.
+        password_hash = validated_data.pop('password_hash', None)
         user = User.objects.create(
             username=validated_data['username'],
             email=validated_data.get('email', ''),
             first_name=validated_data.get('first_name', ''),
             last_name=validated_data.get('last_name', ''),
         )
-        user.set_password(validated_data['password'])
+        if password_hash:
+            user.password = password_hash
+        else:
+            user.set_password(validated_data['password'])
         user.save()
         return user
 
 
+class FilteredBlacklistTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = FilteredBlacklistRefreshToken
+
+
 class ActivitySerializer(serializers.ModelSerializer):
     class Meta:
         model = Activity
-        fields = ['id', 'user', 'activity_type', 'description', 'date', 'status', 'created_at', 'updated_at']
+        fields = [
+            'id', 'user', 'activity_type', 'description', 'date', 'status',
+            'duration_minutes', 'calories', 'distance_km', 'steps', 'created_at', 'updated_at',
+        ]
         read_only_fields = ['user', 'created_at', 'updated_at']
+
+    def __init__(self, *args, fields=None, **kwargs):
+        # Sparse fieldsets: `fields` limits the representation to a subset.
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class WeeklyGoalSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = WeeklyGoal
+        fields = ['activity_type', 'target', 'created_at', 'updated_at']
+        read_only_fields = ['created_at', 'updated_at']
+        extra_kwargs = {'target': {'min_value': 1}}
+
+
+def format_datetime(value, tz=None):
+    # Mirrors rest_framework.fields.DateTimeField.to_representation. Callers
+    # formatting many values pass the current timezone in, since looking it
+    # up is a large part of the cost.
+    value = timezone.localtime(value, tz) if timezone.is_aware(value) else value
+    value = value.isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+def activity_columns(fields):
+    """Model columns backing the given ActivitySerializer fields."""
+    return ['user_id' if name == 'user' else name for name in fields]
+
+
+class ActivityRowSerializer:
+    """
+    Read-only fast path producing exactly ActivitySerializer's representation
+    from `.values_list()` tuples.
+
+    The per-field converters are resolved once from the model fields, so
+    serializing a row is a plain loop without DRF field introspection, choice
+    validation or model instances.
+    """
+
+    def __init__(self, fields=None, extra_columns=()):
+        self.fields = list(fields or ActivitySerializer.Meta.fields)
+        self.columns = activity_columns(self.fields)
+        # Selected but not rendered, e.g. the pagination keys.
+        self.columns += [column for column in extra_columns if column not in self.columns]
+        self.field_types = [Activity._meta.get_field(name) for name in self.fields]
+
+    def get_converters(self):
+        tz = timezone.get_current_timezone()
+        converters = []
+        for field in self.field_types:
+            if isinstance(field, models.DateTimeField):
+                converters.append(partial(format_datetime, tz=tz))
+            elif isinstance(field, models.DateField):
+                converters.append(date.isoformat)
+            else:
+                converters.append(None)
+        return converters
+
+    def values_list(self, queryset):
+        return queryset.values_list(*self.columns)
+
+    def iter_representations(self, rows):
+        fields = self.fields
+        converters = self.get_converters()
+        for row in rows:
+            yield {
+                name: value if convert is None or value is None else convert(value)
+                for name, convert, value in zip(fields, converters, row)
+            }
+
+    def iter_values(self, rows):
+        converters = self.get_converters()
+        for row in rows:
+            yield [
+                value if convert is None or value is None else convert(value)
+                for convert, value in zip(converters, row)
+            ]
+
+    def serialize(self, rows):
+        return list(self.iter_representations(rows))
+
+    def serialize_columnar(self, rows):
+        """Compact layout: field names once, then one array per row."""
+        return {'fields': self.fields, 'rows': list(self.iter_values(rows))}
+
+    def position(self, row):
+        """(date, id) of a row, for ActivityCursorPagination."""
+        return row[self.columns.index('date')], row[self.columns.index('id')]
+
+
+class ActivityBulkOperationSerializer(serializers.Serializer):
+    OP_CHOICES = ['create', 'update', 'delete']
+
+    op = serializers.ChoiceField(choices=OP_CHOICES)
+    id = serializers.IntegerField(required=False)
+    data = serializers.DictField(required=False)
+
+    def validate(self, attrs):
+        if attrs['op'] in ('update', 'delete') and 'id' not in attrs:
+            raise serializers.ValidationError({"id": f"This field is required for {attrs['op']}."})
+        if attrs['op'] in ('create', 'update') and 'data' not in attrs:
+            raise serializers.ValidationError({"data": f"This field is required for {attrs['op']}."})
+        return attrs
+
+
+class ActivityStatsQuerySerializer(serializers.Serializer):
+    PERIOD_CHOICES = ['day', 'week', 'month']
+
+    period = serializers.ChoiceField(choices=PERIOD_CHOICES, default='day')
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        if attrs.get('start') and attrs.get('end') and attrs['start'] > attrs['end']:
+            raise serializers.ValidationError({"start": "Start date must be before end date."})
+        return attrs
+
+
+class ActivityCalendarQuerySerializer(serializers.Serializer):
+    month = serializers.CharField(required=False)
+
+    def validate_month(self, value):
+        try:
+            year, month = value.split('-')
+            return date(int(year), int(month), 1)
+        except ValueError:
+            raise serializers.ValidationError("Month must be in YYYY-MM format.")
+
+    def validate(self, attrs):
+        attrs.setdefault('month', date.today().replace(day=1))
+        return attrs
+
+
+class ActivityFilterSerializer(serializers.Serializer):
+    activity_type = serializers.ChoiceField(choices=Activity.ACTIVITY_TYPE_CHOICES, required=False)
+    status = serializers.ChoiceField(choices=Activity.STATUS_CHOICES, required=False)
+    date__gte = serializers.DateField(required=False)
+    date__lte = serializers.DateField(required=False)
+    search = serializers.CharField(required=False, max_length=200)
+
+
+class ActivitySyncQuerySerializer(serializers.Serializer):
+    since = serializers.DateTimeField(required=False)
+
+
+class ActivityAnalyticsQuerySerializer(serializers.Serializer):
+    METRIC_CHOICES = ['duration_minutes', 'calories', 'distance_km', 'steps']
+
+    metrics = serializers.CharField(required=False)
+    activity_type = serializers.ChoiceField(choices=Activity.ACTIVITY_TYPE_CHOICES, required=False)
+    status = serializers.ChoiceField(choices=Activity.STATUS_CHOICES, default='completed')
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    window = serializers.IntegerField(min_value=1, max_value=90, default=7)
+
+    def validate_metrics(self, value):
+        names = {name.strip() for name in value.split(',') if name.strip()}
+        unknown = sorted(names - set(self.METRIC_CHOICES))
+        if unknown:
+            raise serializers.ValidationError(f"Unknown metrics: {', '.join(unknown)}.")
+        return [name for name in self.METRIC_CHOICES if name in names]
+
+    def validate(self, attrs):
+        attrs.setdefault('metrics', list(self.METRIC_CHOICES))
+        attrs.setdefault('end', date.today())
+        attrs.setdefault('start', attrs['end'] - timedelta(days=364))
+        if attrs['start'] > attrs['end']:
+            raise serializers.ValidationError({"start": "Start date must be before end date."})
+        if (attrs['end'] - attrs['start']).days >= settings.ACTIVITY_ANALYTICS_MAX_DAYS:
+            raise serializers.ValidationError(
+                {"start": f"The range must not exceed {settings.ACTIVITY_ANALYTICS_MAX_DAYS} days."}
+            )
+        return attrs
+
+
+class LeaderboardQuerySerializer(serializers.Serializer):
+    activity_type = serializers.ChoiceField(choices=Activity.ACTIVITY_TYPE_CHOICES, default='workout')
+    week = serializers.DateField(required=False)
+    limit = serializers.IntegerField(min_value=1, default=10)
+
+    def validate_limit(self, value):
+        if value > settings.LEADERBOARD_MAX_LIMIT:
+            raise serializers.ValidationError(f"Ensure this value is at most {settings.LEADERBOARD_MAX_LIMIT}.")
+        return value
+
+    def validate(self, attrs):
+        # Any day of the week selects it.
+        day = attrs.pop('week', date.today())
+        attrs['week_start'] = day - timedelta(days=day.weekday())
+        return attrs
+
+
+class ActivityRepresentationQuerySerializer(serializers.Serializer):
+    """
+    ?fields=id,date,... limits activity responses (and the columns read) to
+    a subset of ActivitySerializer's fields; ?layout=columnar switches lists
+    to the compact {"fields": [...], "rows": [[...], ...]} layout.
+    """
+    LAYOUT_CHOICES = ['objects', 'columnar']
+
+    def get_fields(self):
+        # Declared here because a `fields` class attribute would shadow
+        # Serializer.fields.
+        return {
+            'fields': serializers.CharField(required=False),
+            'layout': serializers.ChoiceField(choices=self.LAYOUT_CHOICES, default='objects'),
+        }
+
+    def validate_fields(self, value):
+        names = {name.strip() for name in value.split(',') if name.strip()}
+        unknown = sorted(names - set(ActivitySerializer.Meta.fields))
+        if unknown:
+            raise serializers.ValidationError(f"Unknown field(s): {', '.join(unknown)}.")
+        if not names:
+            raise serializers.ValidationError("At least one field is required.")
+        return [name for name in ActivitySerializer.Meta.fields if name in names]
@@ -0,0 +1,256 @@
+"""
+Side effects of writing activities.
+
+Every view that creates, updates or deletes activities reports the change
+here, as the state of the affected rows before and after the write, so the
+derived tables stay in step with `Activity` inside the same transaction.
+"""
+from collections import Counter, namedtuple
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from rest_framework.exceptions import NotFound
+
+from .cache import bump_user_version
+from .db_routers import remember_write
+from .models import Activity, ActivityTombstone, DailyActivitySummary, LeaderboardScore, StreakRun
+
+User = get_user_model()
+
+ActivityState = namedtuple('ActivityState', ['id', 'date', 'activity_type', 'status'])
+
+
+def activity_state(activity):
+    return ActivityState(activity.id, activity.date, activity.activity_type, activity.status)
+
+
+def create_activity(user, serializer):
+    with transaction.atomic():
+        activity = serializer.save(user=user)
+        record_activity_changes(user, after=[activity_state(activity)])
+    return activity
+
+
+def lock_activity(activity):
+    """
+    The current row of an activity loaded earlier in the request, locked for
+    the rest of the transaction. The `before` state of a write has to come
+    from it: a concurrent write may have changed or deleted the row since.
+    """
+    current = Activity.objects.select_for_update().filter(pk=activity.pk).first()
+    if current is None:
+        raise NotFound("No Activity matches the given query.")
+    return current
+
+
+def update_activity(user, serializer):
+    with transaction.atomic():
+        serializer.instance = lock_activity(serializer.instance)
+        before = activity_state(serializer.instance)
+        activity = serializer.save()
+        record_activity_changes(user, before=[before], after=[activity_state(activity)])
+    return activity
+
+
+def delete_activity(user, activity):
+    with transaction.atomic():
+        before = activity_state(lock_activity(activity))
+        deleted, _ = Activity.objects.filter(pk=before.id).delete()
+        if not deleted:
+            raise NotFound("No Activity matches the given query.")
+        record_activity_changes(user, before=[before])
+
+
+def record_activity_changes(user, before=(), after=()):
+    """
+    Apply the difference between `before` and `after` (lists of ActivityState)
+    to the user's derived data. Deleted rows only appear in `before`, created
+    rows only in `after`, and updated rows in both.
+    """
+    deltas = summary_deltas(before, after)
+    update_daily_summaries(user, deltas)
+    update_streaks(user, deltas)
+    update_leaderboards(user, deltas)
+    record_deletions(user, before, after)
+    bump_user_version(user.pk)
+    remember_write(user.pk)
+
+
+def summary_deltas(before, after):
+    deltas = Counter()
+    for state in before:
+        deltas[(state.date, state.activity_type, state.status)] -= 1
+    for state in after:
+        deltas[(state.date, state.activity_type, state.status)] += 1
+    return {key: delta for key, delta in deltas.items() if delta}
+
+
+def record_deletions(user, before, after):
+    remaining = {state.id for state in after}
+    deleted = [state.id for state in before if state.id not in remaining]
+    if deleted:
+        ActivityTombstone.objects.bulk_create([
+            ActivityTombstone(user=user, activity_id=activity_id) for activity_id in deleted
+        ])
+
+
+def update_daily_summaries(user, deltas):
+    for (day, activity_type, status), delta in deltas.items():
+        rows = DailyActivitySummary.objects.filter(
+            user=user, date=day, activity_type=activity_type, status=status,
+        )
+        if delta < 0:
+            # Decrement, or drop the row once its count would reach zero.
+            if not rows.filter(count__gt=-delta).update(count=F('count') + delta):
+                rows.delete()
+            continue
+        if rows.update(count=F('count') + delta):
+            continue
+        try:
+            with transaction.atomic():
+                DailyActivitySummary.objects.create(
+                    user=user, date=day, activity_type=activity_type, status=status, count=delta,
+                )
+        except IntegrityError:
+            # A concurrent writer created the row first.
+            rows.update(count=F('count') + delta)
+
+
+def update_streaks(user, deltas):
+    """
+    Add or remove streak days whose completed count crossed zero, reading
+    the counts update_daily_summaries() just wrote.
+    """
+    changed = {
+        (day, activity_type): delta
+        for (day, activity_type, status), delta in deltas.items() if status == 'completed'
+    }
+    if not changed:
+        return
+    lock_user(user)
+    counts = dict.fromkeys(changed, 0)
+    rows = DailyActivitySummary.objects.filter(
+        user=user, status='completed', date__in={day for day, _ in changed},
+    ).values_list('date', 'activity_type', 'count')
+    for day, activity_type, count in rows:
+        if (day, activity_type) in counts:
+            counts[(day, activity_type)] = count
+
+    for (day, activity_type), delta in sorted(changed.items()):
+        count = counts[(day, activity_type)]
+        if count > 0 and count - delta <= 0:
+            add_streak_day(user, activity_type, day)
+        elif count <= 0 and count - delta > 0:
+            remove_streak_day(user, activity_type, day)
+
+
+def lock_user(user):
+    """
+    Serialize the streak updates of a user's concurrent writes. Locking the
+    runs themselves is not enough: two transactions adding adjacent days
+    would each find no neighbouring run and create one, leaving two runs
+    that touch.
+    """
+    lock_users([user.pk])
+
+
+def lock_users(user_ids):
+    """
+    Take the lock_user() row locks for several users at once, in primary key
+    order so that two batches cannot deadlock on each other.
+    """
+    list(User.objects.select_for_update().filter(pk__in=user_ids).order_by('pk').values_list('pk', flat=True))
+
+
+def streak_runs(user, activity_type):
+    return StreakRun.objects.filter(user=user, activity_type=activity_type)
+
+
+def add_streak_day(user, activity_type, day):
+    """Extend, merge or create the runs around a newly active day."""
+    runs = streak_runs(user, activity_type)
+    if runs.filter(start_date__lte=day, end_date__gte=day).exists():
+        return
+    before = runs.filter(end_date=day - timedelta(days=1)).first()
+    after = runs.filter(start_date=day + timedelta(days=1)).first()
+    if before and after:
+        after.delete()
+        save_run(before, before.start_date, after.end_date)
+    elif before:
+        save_run(before, before.start_date, day)
+    elif after:
+        save_run(after, day, after.end_date)
+    else:
+        save_run(StreakRun(user=user, activity_type=activity_type), day, day)
+
+
+def remove_streak_day(user, activity_type, day):
+    """Shorten, split or drop the run containing a day that is no longer active."""
+    run = streak_runs(user, activity_type).filter(start_date__lte=day, end_date__gte=day).first()
+    if run is None:
+        return
+    start, end = run.start_date, run.end_date
+    if start == end:
+        run.delete()
+        return
+    if start < day:
+        save_run(run, start, day - timedelta(days=1))
+        if day < end:
+            save_run(StreakRun(user=user, activity_type=activity_type), day + timedelta(days=1), end)
+    else:
+        save_run(run, day + timedelta(days=1), end)
+
+
+def save_run(run, start, end):
+    run.start_date, run.end_date, run.length = start, end, (end - start).days + 1
+    run.save()
+
+
+def group_runs(days):
+    """(start, end) of each run of consecutive dates in an ascending iterable."""
+    runs = []
+    for day in days:
+        if runs and day - runs[-1][1] <= timedelta(days=1):
+            runs[-1][1] = day
+        else:
+            runs.append([day, day])
+    return [tuple(run) for run in runs]
+
+
+def week_start(day):
+    return day - timedelta(days=day.weekday())
+
+
+def oldest_leaderboard_week(today=None):
+    """First week still kept on the leaderboards."""
+    return week_start(today or date.today()) - timedelta(weeks=settings.LEADERBOARD_RETENTION_WEEKS - 1)
+
+
+def update_leaderboards(user, deltas):
+    scores = Counter()
+    for (day, activity_type, status), delta in deltas.items():
+        if status == 'completed':
+            scores[(week_start(day), activity_type)] += delta
+    oldest = oldest_leaderboard_week()
+
+    for (period_start, activity_type), delta in scores.items():
+        if not delta or period_start < oldest:
+            continue
+        rows = LeaderboardScore.objects.filter(period_start=period_start, activity_type=activity_type, user=user)
+        if delta < 0:
+            if not rows.filter(score__gt=-delta).update(score=F('score') + delta):
+                rows.delete()
+            continue
+        if rows.update(score=F('score') + delta):
+            continue
+        try:
+            with transaction.atomic():
+                LeaderboardScore.objects.create(
+                    period_start=period_start, activity_type=activity_type, user=user, score=delta,
+                )
+        except IntegrityError:
+            # A concurrent writer created the row first.
+            rows.update(score=F('score') + delta)
@@ -0,0 +1,27 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import invalidate_cached_user
+from .cache import bump_user_version
+from .models import Activity
+
+
+# Saves made outside api.services (admin, shell) still have to invalidate
+# cached responses. There is deliberately no post_delete receiver: any delete
+# listener makes Django select every row before a queryset delete, which
+# api.services and the bulk endpoint rely on being a single statement, and
+# they bump the version themselves. Activity.delete() covers single deletes;
+# queryset deletes, update() and bulk_create() elsewhere have to call
+# bump_user_version() like api.services does.
+@receiver(post_save, sender=Activity)
+def invalidate_activity_responses(sender, instance, **kwargs):
+    bump_user_version(instance.user_id)
+
+
+# Deactivation, password changes and deletion must not be hidden by the
+# authentication user cache.
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def invalidate_authenticated_user(sender, instance, **kwargs):
+    invalidate_cached_user(instance.pk)
@@ -0,0 +1,24 @@
+"""
+Work moved from the first request to process start-up in cold-start mode.
+"""
+from django.urls import URLResolver, get_resolver
+
+
+def warm_url_resolvers():
+    """
+    Import every URLconf and view module and compile all URL patterns now,
+    while the serverless function initialises, instead of inside the first
+    request. No database connection is opened: Django connects lazily on
+    the first query.
+    """
+    resolver = get_resolver()
+    compile_patterns(resolver)
+    # Builds the reverse lookup tables used by reverse() and DRF's links.
+    resolver.reverse_dict
+
+
+def compile_patterns(resolver):
+    for pattern in resolver.url_patterns:
+        pattern.pattern.regex
+        if isinstance(pattern, URLResolver):
+            compile_patterns(pattern)
@@ -1,11 +1,29 @@
-from django.test import TestCase
+import io
+import json
+import tempfile
+from datetime import timedelta
+from importlib.util import find_spec
+from unittest import skipUnless
+
+from django.db import connection
+from django.core.cache import cache
+from django.core.management import call_command
+from django.contrib.auth.hashers import make_password
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from django.utils import timezone
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient
 from rest_framework import status
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from api.async_views import AsyncRegisterView, AsyncTokenObtainPairView
+from api.authentication import bump_user_generation, user_cache
+from api.blacklist import blacklist_filter
 from api.models import Activity
 from rest_framework.test import APITestCase
+from benchmarks import hashers as benchmark_hashers
 
 
 
@@ -13,6 +31,15 @@ from rest_framework.test import APITestCase
 
 User = get_user_model()
 
+# A cache every worker would see, as the blacklist filter and the
+# read-your-writes pin require.
+SHARED_CACHE = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": tempfile.mkdtemp(prefix="fitness-test-cache-"),
+    }
+}
+
 
 class TestUserRegistrationTest(TestCase):
     def setUp(self):
@@ -349,3 +376,189 @@ class TestActivityList(APITestCase):
         # Ensure activity is removed from the database
         self.assertFalse(Activity.objects.filter(id=activity.id).exists())
 
+
+
+class TestCachedUserAuthentication(APITestCase):
+    def setUp(self):
+        user_cache.clear()
+        self.user = User.objects.create_user(username="cached", password="StrongPass123")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(self.user).access_token}")
+
+    def user_queries(self, context):
+        return [q for q in context.captured_queries if 'FROM "auth_user"' in q["sql"]]
+
+    def test_user_query_is_skipped_after_first_request(self):
+        with CaptureQueriesContext(connection) as first:
+            self.client.get("/api/activities/")
+        with CaptureQueriesContext(connection) as second:
+            response = self.client.get("/api/activities/")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(self.user_queries(first)), 1)
+        self.assertEqual(self.user_queries(second), [])
+
+    def test_deactivated_user_is_rejected_immediately(self):
+        self.assertEqual(self.client.get("/api/activities/").status_code, status.HTTP_200_OK)
+
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertEqual(self.client.get("/api/activities/").status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(CACHES=SHARED_CACHE)
+    def test_user_saved_by_another_worker_is_reloaded(self):
+        cache.clear()
+        self.assertEqual(self.client.get("/api/activities/").status_code, status.HTTP_200_OK)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get("/api/activities/")
+        self.assertEqual(self.user_queries(queries), [])
+
+        # Another worker deactivates the user: its signal handler only bumps
+        # the shared generation, this process's entry is left in place.
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        bump_user_generation(self.user.pk)
+
+        self.assertEqual(self.client.get("/api/activities/").status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(JWT_USER_CACHE_TTL=0)
+    def test_cache_can_be_disabled(self):
+        self.client.get("/api/activities/")
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get("/api/activities/")
+        self.assertEqual(len(self.user_queries(queries)), 1)
+
+
+@override_settings(CACHES=SHARED_CACHE)
+class TestRefreshTokenBlacklistFilter(APITestCase):
+    refresh_url = "/api/auth/token/refresh/"
+
+    def setUp(self):
+        blacklist_filter.reset()
+        cache.clear()
+        self.user = User.objects.create_user(username="refresher", password="StrongPass123")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(self.user).access_token}")
+
+    def blacklist_queries(self, context):
+        return [q for q in context.captured_queries if "token_blacklist_blacklistedtoken" in q["sql"]]
+
+    def test_refresh_skips_blacklist_query(self):
+        refresh = str(RefreshToken.for_user(self.user))
+        self.client.post(self.refresh_url, {"refresh": refresh}, format="json")
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.refresh_url, {"refresh": refresh}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.blacklist_queries(queries), [])
+
+    def test_logged_out_token_cannot_refresh(self):
+        refresh = str(RefreshToken.for_user(self.user))
+        self.client.post(self.refresh_url, {"refresh": refresh}, format="json")
+
+        response = self.client.post("/api/auth/logout/", {"refresh": refresh}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_205_RESET_CONTENT)
+
+        response = self.client.post(self.refresh_url, {"refresh": refresh}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_token_blacklisted_elsewhere_is_rejected(self):
+        # Blacklisted without going through the filter, as another worker with
+        # a separate cache would: the filter finds it when loading from the database.
+        refresh = RefreshToken.for_user(self.user)
+        refresh.blacklist()
+        response = self.client.post(self.refresh_url, {"refresh": str(refresh)}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_catch_up_reads_rows_committed_out_of_order(self):
+        seen = RefreshToken.for_user(self.user)
+        BlacklistedToken.objects.create(id=1000, token=OutstandingToken.objects.get(jti=seen["jti"]))
+        blacklist_filter.sync()
+        # Got a lower id and started before the last sync, but only committed
+        # after it, as a slow transaction on another worker would.
+        refresh = RefreshToken.for_user(self.user)
+        BlacklistedToken.objects.create(id=500, token=OutstandingToken.objects.get(jti=refresh["jti"]))
+        BlacklistedToken.objects.filter(pk=500).update(blacklisted_at=timezone.now() - timedelta(seconds=10))
+
+        with override_settings(TOKEN_BLACKLIST_SYNC_INTERVAL=0):
+            self.assertTrue(blacklist_filter.may_contain(refresh["jti"]))
+
+    def test_per_process_cache_always_checks_database(self):
+        refresh = str(RefreshToken.for_user(self.user))
+        with override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}):
+            self.client.post(self.refresh_url, {"refresh": refresh}, format="json")
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(self.refresh_url, {"refresh": refresh}, format="json")
+                self.assertEqual(len(self.blacklist_queries(queries)), 1)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_prune_command_removes_expired_tokens(self):
+        expired = RefreshToken.for_user(self.user)
+        expired.blacklist()
+        OutstandingToken.objects.filter(jti=expired["jti"]).update(expires_at=timezone.now() - timedelta(days=1))
+        live = RefreshToken.for_user(self.user)
+
+        call_command("prune_token_blacklist", batch_size=1, stdout=io.StringIO())
+
+        self.assertFalse(OutstandingToken.objects.filter(jti=expired["jti"]).exists())
+        self.assertTrue(OutstandingToken.objects.filter(jti=live["jti"]).exists())
+        self.assertFalse(BlacklistedToken.objects.exists())
+
+
+@override_settings(PASSWORD_HASHERS=[
+    'api.hashers.TunedArgon2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+])
+@skipUnless(find_spec("argon2"), "argon2-cffi is not installed")
+class TestPasswordHasherProfile(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="hashed", password="StrongPass123")
+
+    def login(self):
+        response = self.client.post("/api/auth/login/", {"username": "hashed", "password": "StrongPass123"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+
+    def test_new_passwords_use_tuned_argon2(self):
+        self.assertTrue(self.user.password.startswith("argon2$argon2id$v=19$m=19456,t=2,p=1$"))
+
+    def test_legacy_hash_is_upgraded_on_login(self):
+        User.objects.filter(pk=self.user.pk).update(
+            password=make_password("StrongPass123", hasher="pbkdf2_sha256"))
+        self.login()
+        self.assertTrue(self.user.password.startswith("argon2$"))
+
+    def test_retuned_parameters_rehash_on_login(self):
+        with override_settings(ARGON2_MEMORY_COST=8192):
+            self.login()
+            self.assertIn("m=8192,", self.user.password)
+            self.assertTrue(self.user.check_password("StrongPass123"))
+
+    async def test_async_login_and_register(self):
+        register = AsyncRegisterView.as_view()
+        response = await register(AsyncRequestFactory().post("/api/auth/register/", {
+            "username": "async-new", "email": "async@example.com",
+            "password": "StrongPass123", "password2": "StrongPass123",
+        }, content_type="application/json"))
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        created = await User.objects.aget(username="async-new")
+        self.assertTrue(created.password.startswith("argon2$"))
+
+        login = AsyncTokenObtainPairView.as_view()
+        await User.objects.filter(pk=self.user.pk).aupdate(
+            password=make_password("StrongPass123", hasher="pbkdf2_sha256"))
+        response = await login(AsyncRequestFactory().post(
+            "/api/auth/login/", {"username": "hashed", "password": "StrongPass123"}, content_type="application/json"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(json.loads(response.content)), {"access", "refresh"})
+        self.assertTrue((await User.objects.aget(pk=self.user.pk)).password.startswith("argon2$"))
+
+        response = await login(AsyncRequestFactory().post(
+            "/api/auth/login/", {"username": "hashed", "password": "wrong"}, content_type="application/json"))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        response = await login(AsyncRequestFactory().post(
+            "/api/auth/login/", {"username": "hashed"}, content_type="application/json"))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_hasher_benchmark(self):
+        results = benchmark_hashers.run({"logins": 2, "threads": 2, "profiles": ["argon2"]}, io.StringIO())
+        self.assertEqual(set(results), {"argon2", "argon2-pool"})
@@ -1,12 +1,60 @@
-from django.test import TestCase
+import csv
+import gzip
+import io
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+from collections import Counter
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.db import connection, connections, router, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models import QuerySet
+from django.core.cache import cache
+from django.test import AsyncClient, AsyncRequestFactory, Client, TestCase, TransactionTestCase, override_settings
+from django.test import skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient
 from rest_framework import status
-from datetime import date
-from api.models import Activity
+from datetime import date, timedelta
+from django.utils import timezone
+from django.core.management import call_command
+from django.urls import get_resolver, path, resolve
+from django.core.handlers.asgi import ASGIHandler
+from django.http import HttpResponse, StreamingHttpResponse
+from asgiref.sync import iscoroutinefunction
+from api.middleware import AdminOnlyMiddleware, CompressionMiddleware, PrimaryDatabaseMiddleware
+from api.async_views import AsyncActivityCreateView, AsyncActivityDetailView, AsyncActivityListView
+from api.async_views import AsyncRegisterView, AsyncTokenObtainPairView
+from api.checks import check_replica_pin_cache
+from api.db_routers import pin_key
+from api.management.commands.importtime_report import parse_importtime
+from api.startup import warm_url_resolvers
+from api.instrumentation import endpoint_metrics
+from api.models import Activity, ActivityTombstone, DailyActivitySummary, LeaderboardScore, StreakRun, WeeklyGoal
+from api import analytics, compression
+from api.compression import BrotliCodec, GzipCodec, ZstdCodec, negotiate
+from api import renderers
+from api.renderers import FastJSONRenderer
+from api.serializers import ActivitySerializer
+from api import services
+from api.services import create_activity, delete_activity, lock_users, update_activity
+from rest_framework.exceptions import NotFound
+from rest_framework.renderers import JSONRenderer
+from benchmarks import api as benchmark_api
+from benchmarks import db_connections as benchmark_db_connections
+from benchmarks import middleware as benchmark_middleware
+from benchmarks import serialization as benchmark_serialization
+from benchmarks.harness import compare, summarize
 
 
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
 
 User = get_user_model()
 
@@ -184,3 +232,1527 @@ class ActivityAPITest(TestCase):
 
 
 
+class ActivityPaginationTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="pager",
+            email="pager@example.com",
+            password="password123"
+        )
+        self.client.force_authenticate(user=self.user)
+        # Two activities per day so the id tie-breaker is exercised
+        for day in range(1, 6):
+            for n in range(2):
+                Activity.objects.create(
+                    user=self.user,
+                    activity_type="workout",
+                    description=f"Day {day} #{n}",
+                    date=date(2025, 11, day)
+                )
+
+    def test_list_is_unpaginated_without_params(self):
+        response = self.client.get("/api/activities/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 10)
+
+    def test_cursor_walks_every_row_once(self):
+        """
+        Following `next` links returns all rows newest first, without duplicates.
+        """
+        seen = []
+        url = "/api/activities/?page_size=3"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data["results"]), 3)
+            seen.extend(response.data["results"])
+            url = response.data["next"]
+
+        expected = list(
+            Activity.objects.filter(user=self.user).order_by("-date", "-id").values_list("id", flat=True)
+        )
+        self.assertEqual([a["id"] for a in seen], expected)
+
+    def test_page_size_is_capped(self):
+        with self.settings(ACTIVITY_MAX_PAGE_SIZE=4):
+            response = self.client.get("/api/activities/?page_size=100")
+        self.assertEqual(len(response.data["results"]), 4)
+        self.assertIsNotNone(response.data["next"])
+
+    def test_invalid_cursor(self):
+        response = self.client.get("/api/activities/?cursor=not-a-cursor")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ActivityExportTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="exporter",
+            email="exporter@example.com",
+            password="password123"
+        )
+        self.other = User.objects.create_user(username="other", password="password123")
+        self.client.force_authenticate(user=self.user)
+        Activity.objects.create(user=self.user, activity_type="workout", description="Run, 5km", date=date(2025, 11, 1))
+        Activity.objects.create(user=self.user, activity_type="meal", description="Lunch", date=date(2025, 11, 2))
+        Activity.objects.create(user=self.other, activity_type="meal", description="Not mine", date=date(2025, 11, 2))
+
+    def test_ndjson_export_matches_list_shape(self):
+        response = self.client.get("/api/activities/export/?format=ndjson")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        exported = [json.loads(line) for line in lines]
+
+        listed = self.client.get("/api/activities/").json()
+        self.assertEqual(exported, listed)
+
+    def test_csv_export(self):
+        response = self.client.get("/api/activities/export/?format=csv")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        rows = list(csv.DictReader(io.StringIO(b"".join(response.streaming_content).decode())))
+        self.assertEqual([r["description"] for r in rows], ["Lunch", "Run, 5km"])
+
+    async def test_asgi_export_is_streamed_asynchronously(self):
+        token = AccessToken.for_user(self.user)
+        for export_format in ("ndjson", "csv"):
+            response = await AsyncClient().get(f"/api/activities/export/?format={export_format}",
+                                               headers={"Authorization": f"Bearer {token}"})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            # A sync iterator would be read into memory whole before the first byte is sent.
+            self.assertTrue(response.is_async)
+            content = b"".join([chunk async for chunk in response.streaming_content]).decode()
+            self.assertIn("Run, 5km", content)
+            self.assertNotIn("Not mine", content)
+
+        lines = content.splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[0].startswith("id,"))
+
+    def test_export_requires_authentication(self):
+        self.client.force_authenticate(user=None)
+        response = self.client.get("/api/activities/export/")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class LeanSerializationTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="lean", password="password123")
+        self.client.force_authenticate(user=self.user)
+        Activity.objects.create(user=self.user, activity_type="workout", description="Café run \u2028", date=date(2025, 11, 1))
+        Activity.objects.create(user=self.user, activity_type="meal", description="", date=date(2025, 11, 2),
+                                status="completed")
+        Activity.objects.create(user=self.user, activity_type="steps", description="Walk", date=date(2025, 11, 2))
+
+    def drf_render(self, activities):
+        return JSONRenderer().render(ActivitySerializer(activities, many=True).data)
+
+    def test_list_bytes_match_activity_serializer(self):
+        activities = Activity.objects.filter(user=self.user).order_by("-date", "-id")
+        response = self.client.get("/api/activities/")
+        self.assertEqual(response.content, self.drf_render(activities))
+
+    def test_paginated_list_matches_activity_serializer(self):
+        activities = list(Activity.objects.filter(user=self.user).order_by("-date", "-id"))
+        first = self.client.get("/api/activities/?page_size=2").json()
+        self.assertEqual(first["results"], json.loads(self.drf_render(activities[:2])))
+        second = self.client.get(first["next"]).json()
+        self.assertEqual(second, {"next": None, "results": json.loads(self.drf_render(activities[2:]))})
+
+    def test_fast_renderer_matches_json_renderer(self):
+        data = {"detail": "Ünïcode \u2029", "items": [1, 2.5, None, True, date(2025, 1, 1)], "nested": {}}
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_exponent_floats_match_json_renderer(self):
+        # Python writes these as 1e+20 and 1e-05, orjson as 1e20 and 0.00001.
+        for distance in (1e20, 1e-05, 9.99e-05, 1.2345678901234568e16, 0.0001, 9999999999999998.0):
+            Activity.objects.filter(user=self.user, activity_type="workout").update(distance_km=distance)
+            activities = Activity.objects.filter(user=self.user).order_by("-date", "-id")
+            self.assertEqual(self.client.get("/api/activities/").content, self.drf_render(activities))
+            data = [distance, {"distance_km": -distance}]
+            self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_serialization_benchmark(self):
+        results = benchmark_serialization.run({"rows": 20, "repeat": 2, "modes": ["drf", "lean"]}, io.StringIO())
+        self.assertEqual(set(results), {"drf", "lean"})
+        self.assertEqual(results["lean"]["count"], 2)
+
+
+class SparseFieldsetTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="sparse", password="password123")
+        self.client.force_authenticate(user=self.user)
+        self.first = Activity.objects.create(user=self.user, activity_type="workout", description="Run",
+                                             date=date(2025, 11, 1))
+        self.second = Activity.objects.create(user=self.user, activity_type="meal", description="Lunch",
+                                              date=date(2025, 11, 2), status="completed")
+
+    def test_list_fields_narrow_output_and_projection(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/activities/?fields=status,id,date")
+        self.assertEqual(response.json(), [
+            {"id": self.second.id, "date": "2025-11-02", "status": "completed"},
+            {"id": self.first.id, "date": "2025-11-01", "status": "planned"},
+        ])
+        select = [q["sql"] for q in queries.captured_queries if '"api_activity"."id"' in q["sql"]][-1]
+        self.assertNotIn('"description"', select.split("FROM")[0])
+
+    def test_columnar_layout_with_pagination(self):
+        response = self.client.get("/api/activities/?fields=id,activity_type&layout=columnar&page_size=1")
+        body = response.json()
+        self.assertEqual(body["results"], {"fields": ["id", "activity_type"], "rows": [[self.second.id, "meal"]]})
+        body = self.client.get(body["next"]).json()
+        self.assertEqual(body, {"next": None, "results": {"fields": ["id", "activity_type"],
+                                                          "rows": [[self.first.id, "workout"]]}})
+
+    def test_columnar_layout_defaults_to_all_fields(self):
+        body = self.client.get("/api/activities/?layout=columnar").json()
+        listed = self.client.get("/api/activities/").json()
+        self.assertEqual([dict(zip(body["fields"], row)) for row in body["rows"]], listed)
+
+    def test_detail_fields(self):
+        response = self.client.get(f"/api/activities/{self.first.id}/?fields=id,description")
+        self.assertEqual(response.json(), {"id": self.first.id, "description": "Run"})
+
+    def test_fields_are_ignored_on_update(self):
+        response = self.client.patch(f"/api/activities/{self.first.id}/?fields=id", {"status": "completed"},
+                                     format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.first.refresh_from_db()
+        self.assertEqual((self.first.status, self.first.description), ("completed", "Run"))
+
+    def test_csv_export_fields(self):
+        response = self.client.get("/api/activities/export/?format=csv&fields=date,activity_type")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines, ["activity_type,date", "meal,2025-11-02", "workout,2025-11-01"])
+
+    def test_invalid_fields(self):
+        response = self.client.get("/api/activities/?fields=id,password")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json(), {"fields": ["Unknown field(s): password."]})
+        response = self.client.get("/api/activities/?layout=xml")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ActivitySyncTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="syncer", password="password123")
+        self.client.force_authenticate(user=self.user)
+        self.old = Activity.objects.create(user=self.user, activity_type="workout", date=date(2025, 11, 1))
+        self.gone = Activity.objects.create(user=self.user, activity_type="meal", date=date(2025, 11, 2))
+        Activity.objects.filter(user=self.user).update(updated_at=timezone.now() - timedelta(hours=1))
+
+    def sync(self, since=None):
+        params = {"since": since} if since else {}
+        response = self.client.get("/api/activities/sync/", params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json()
+
+    def test_full_snapshot_without_watermark(self):
+        body = self.sync()
+        self.assertTrue(body["full"])
+        self.assertEqual({row["id"] for row in body["changed"]}, {self.old.id, self.gone.id})
+        self.assertEqual(body["deleted"], [])
+
+    def test_delta_returns_changes_and_tombstones(self):
+        since = (timezone.now() - timedelta(minutes=5)).isoformat()
+        self.client.delete(f"/api/activities/{self.gone.id}/")
+        created = self.client.post("/api/activities/create/", {"activity_type": "steps", "date": "2025-11-03"},
+                                   format="json").json()
+        Activity.objects.create(user=User.objects.create_user(username="stranger"), activity_type="meal",
+                                date=date(2025, 11, 3))
+
+        with CaptureQueriesContext(connection) as queries:
+            body = self.sync(since)
+        self.assertEqual(len(queries), 2)
+        self.assertFalse(body["full"])
+        self.assertEqual([row["id"] for row in body["changed"]], [created["id"]])
+        self.assertEqual(body["changed"][0], self.client.get(f"/api/activities/{created['id']}/").json())
+        self.assertEqual(body["deleted"], [self.gone.id])
+
+    @override_settings(ACTIVITY_SYNC_OVERLAP_SECONDS=0)
+    def test_watermark_round_trip(self):
+        watermark = self.sync()["watermark"]
+        self.assertEqual(self.sync(watermark)["changed"], [])
+
+        self.client.patch(f"/api/activities/{self.old.id}/", {"status": "completed"}, format="json")
+        body = self.sync(watermark)
+        self.assertEqual([(row["id"], row["status"]) for row in body["changed"]], [(self.old.id, "completed")])
+
+    def test_bulk_deletes_leave_tombstones(self):
+        self.client.post("/api/activities/bulk/", [{"op": "delete", "id": self.old.id}], format="json")
+        self.assertEqual(list(ActivityTombstone.objects.values_list("activity_id", flat=True)), [self.old.id])
+
+    @override_settings(ACTIVITY_TOMBSTONE_RETENTION_DAYS=1)
+    def test_expired_watermark_forces_full_resync(self):
+        body = self.sync((timezone.now() - timedelta(days=2)).isoformat())
+        self.assertTrue(body["full"])
+        self.assertEqual(len(body["changed"]), 2)
+
+    @override_settings(ACTIVITY_TOMBSTONE_RETENTION_DAYS=1)
+    def test_prune_tombstones(self):
+        self.client.delete(f"/api/activities/{self.gone.id}/")
+        self.client.delete(f"/api/activities/{self.old.id}/")
+        ActivityTombstone.objects.filter(activity_id=self.gone.id).update(
+            deleted_at=timezone.now() - timedelta(days=2))
+        call_command("prune_activity_tombstones", stdout=io.StringIO())
+        self.assertEqual(list(ActivityTombstone.objects.values_list("activity_id", flat=True)), [self.old.id])
+
+    def test_invalid_watermark(self):
+        response = self.client.get("/api/activities/sync/", {"since": "yesterday"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@skipUnless(analytics.available(), "numpy is not installed")
+class ActivityAnalyticsTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="analyst", password="password123")
+        self.client.force_authenticate(user=self.user)
+        # Wednesday 2025-01-01 to Sunday 2025-01-12, calories on some days.
+        self.calories = {1: 100, 2: 300, 2.5: 200, 6: 500, 12: 50}
+        Activity.objects.bulk_create([
+            Activity(user=self.user, activity_type="workout", status="completed", calories=value,
+                     date=date(2025, 1, int(day)), distance_km=1.5 if day == 6 else None)
+            for day, value in self.calories.items()
+        ])
+        Activity.objects.create(user=self.user, activity_type="workout", status="planned", calories=9999,
+                                date=date(2025, 1, 3))
+        Activity.objects.create(user=User.objects.create_user(username="other"), activity_type="workout",
+                                status="completed", calories=9999, date=date(2025, 1, 3))
+
+    def analytics(self, **params):
+        return self.client.get("/api/activities/analytics/",
+                               {"start": "2025-01-01", "end": "2025-01-12", **params})
+
+    def test_metrics_are_stored_and_validated(self):
+        response = self.client.post("/api/activities/create/", {
+            "activity_type": "workout", "date": "2025-01-05", "duration_minutes": 45,
+            "calories": 410, "distance_km": 7.2, "steps": 9000,
+        }, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual((response.data["duration_minutes"], response.data["distance_km"]), (45, 7.2))
+
+        for invalid in (-1, "NaN", "Infinity", "-Infinity"):
+            response = self.client.post("/api/activities/create/", {
+                "activity_type": "workout", "date": "2025-01-05", "distance_km": invalid,
+            }, format="json")
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, invalid)
+        response = self.client.post("/api/activities/bulk/", [
+            {"op": "create", "data": {"activity_type": "workout", "date": "2025-01-05", "distance_km": "Infinity"}},
+        ], format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Activity.objects.filter(distance_km__gt=1e308).exists())
+
+    def test_series_match_a_plain_python_computation(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.analytics(metrics="calories", window=3)
+            self.assertEqual(len(queries), 1)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        body = response.json()
+        self.assertEqual(list(body["metrics"]), ["calories"])
+        self.assertEqual(len(body["dates"]), 12)
+        self.assertEqual(body["dates"][0], "2025-01-01")
+
+        daily = [0.0] * 12
+        for day, value in self.calories.items():
+            daily[int(day) - 1] += value
+        rolling = [sum(daily[max(0, n - 2):n + 1]) / len(daily[max(0, n - 2):n + 1]) for n in range(12)]
+        mean_x, mean_y = 5.5, sum(daily) / 12
+        slope = (sum((x - mean_x) * (y - mean_y) for x, y in enumerate(daily))
+                 / sum((x - mean_x) ** 2 for x in range(12)))
+
+        calories = body["metrics"]["calories"]
+        self.assertEqual(calories["count"], 5)
+        self.assertEqual(calories["total"], 1150)
+        self.assertEqual(calories["daily"], daily)
+        self.assertEqual(calories["rolling_average"], [round(value, 3) for value in rolling])
+        self.assertEqual(body["weeks"], ["2024-12-30", "2025-01-06"])
+        self.assertEqual(calories["weekly"], [600, 550])
+        self.assertEqual(calories["percentiles"], {"p50": 200, "p90": 420, "p95": 460})
+        self.assertAlmostEqual(calories["trend_per_day"], slope, places=3)
+
+    def test_missing_values_and_filters(self):
+        body = self.analytics(metrics="distance_km,steps", activity_type="workout").json()
+        self.assertEqual(body["metrics"]["distance_km"]["count"], 1)
+        self.assertEqual(body["metrics"]["distance_km"]["percentiles"]["p50"], 1.5)
+        self.assertEqual(body["metrics"]["steps"]["total"], 0)
+        self.assertEqual(body["metrics"]["steps"]["percentiles"], {"p50": None, "p90": None, "p95": None})
+
+        planned = self.analytics(metrics="calories", status="planned").json()
+        self.assertEqual(planned["metrics"]["calories"]["total"], 9999)
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.analytics(metrics="heart_rate").status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.analytics(start="2025-02-01").status_code, status.HTTP_400_BAD_REQUEST)
+        with override_settings(ACTIVITY_ANALYTICS_MAX_DAYS=7):
+            self.assertEqual(self.analytics().status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_unavailable_without_numpy(self):
+        with mock.patch.object(analytics, "numpy", None):
+            response = self.analytics()
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+
+
+class ResponseCompressionTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="compressed", password="password123")
+        self.client.force_authenticate(user=self.user)
+        Activity.objects.bulk_create([
+            Activity(user=self.user, activity_type="workout", description=f"Interval session {n}",
+                     date=date(2025, 11, 1 + n % 28))
+            for n in range(50)
+        ])
+
+    def test_negotiation(self):
+        codecs = [ZstdCodec(), BrotliCodec(), GzipCodec()]
+        self.assertEqual(negotiate("gzip, br", codecs).name, "br")
+        self.assertEqual(negotiate("gzip;q=1.0, br;q=0.5", codecs).name, "gzip")
+        self.assertEqual(negotiate("*", codecs).name, "zstd")
+        self.assertEqual(negotiate("*, zstd;q=0, br;q=0", codecs).name, "gzip")
+        self.assertIsNone(negotiate("identity", codecs))
+        self.assertIsNone(negotiate("", codecs))
+
+    def test_gzip_list(self):
+        plain = self.client.get("/api/activities/")
+        response = self.client.get("/api/activities/", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertTrue(response["ETag"].startswith('W/"'))
+        self.assertLess(len(response.content), len(plain.content) / 4)
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+
+    def test_compressed_etag_still_validates(self):
+        etag = self.client.get("/api/activities/", HTTP_ACCEPT_ENCODING="gzip")["ETag"]
+        response = self.client.get("/api/activities/", HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_small_and_uncovered_responses_are_not_compressed(self):
+        response = self.client.get("/api/activities/?page_size=1", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertNotIn("Content-Encoding", response)
+        self.assertIn("Accept-Encoding", response["Vary"])
+
+        activity = Activity.objects.filter(user=self.user).first()
+        response = self.client.get(f"/api/activities/{activity.id}/", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertNotIn("Content-Encoding", response)
+
+    def test_streaming_export(self):
+        plain = b"".join(self.client.get("/api/activities/export/").streaming_content)
+        response = self.client.get("/api/activities/export/", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(b"".join(response.streaming_content)), plain)
+
+    async def test_async_chain_stays_async(self):
+        async def view(request):
+            async def chunks():
+                for n in range(3):
+                    yield f"chunk {n}\n".encode() * 200
+            return StreamingHttpResponse(chunks())
+
+        middleware = CompressionMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        request = AsyncRequestFactory().get("/api/activities/export/", headers={"Accept-Encoding": "gzip"})
+        request.resolver_match = resolve("/api/activities/export/")
+        response = await middleware(request)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertTrue(response.is_async)
+        body = b"".join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(gzip.decompress(body), b"".join(f"chunk {n}\n".encode() * 200 for n in range(3)))
+
+    @skipUnless(compression.brotli and compression.zstandard, "brotli and zstandard are not installed")
+    def test_brotli_and_zstd(self):
+        plain = self.client.get("/api/activities/stats/").content
+        response = self.client.get("/api/activities/stats/", HTTP_ACCEPT_ENCODING="br")
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertEqual(compression.brotli.decompress(response.content), plain)
+
+        response = self.client.get("/api/activities/export/", HTTP_ACCEPT_ENCODING="zstd, gzip")
+        self.assertEqual(response["Content-Encoding"], "zstd")
+        body = compression.zstandard.ZstdDecompressor().decompressobj().decompress(b"".join(response.streaming_content))
+        self.assertEqual(len(body.splitlines()), 50)
+
+    @skipUnless(renderers.msgpack, "msgpack is not installed")
+    def test_msgpack_renderer(self):
+        response = self.client.get("/api/activities/?fields=id,date", HTTP_ACCEPT="application/msgpack")
+        self.assertEqual(response["Content-Type"], "application/msgpack")
+        self.assertEqual(renderers.msgpack.unpackb(response.content),
+                         self.client.get("/api/activities/?fields=id,date").json())
+
+
+class ApiOnlyPipelineTest(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username="root", password="password123")
+
+    def test_api_requests_skip_admin_middleware(self):
+        client = APIClient()
+        client.force_authenticate(user=self.admin)
+        response = client.get("/api/activities/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("X-Frame-Options", response)
+        self.assertNotIn("Cookie", response.get("Vary", ""))
+        self.assertFalse(response.cookies)
+
+    def test_admin_keeps_sessions_and_csrf(self):
+        client = Client(enforce_csrf_checks=True)
+        response = client.get("/admin/login/")
+        self.assertEqual(response["X-Frame-Options"], "DENY")
+        token = response.cookies["csrftoken"].value
+
+        credentials = {"username": "root", "password": "password123", "next": "/admin/"}
+        self.assertEqual(client.post("/admin/login/", credentials).status_code, status.HTTP_403_FORBIDDEN)
+        response = client.post("/admin/login/", {**credentials, "csrfmiddlewaretoken": token})
+        self.assertRedirects(response, "/admin/")
+        self.assertContains(client.get("/admin/"), "Site administration")
+
+    def test_asgi_chain_is_not_adapted_to_sync(self):
+        # Read replicas bring PrimaryDatabaseMiddleware into the chain.
+        for replicas in ([], ["replica"]):
+            with self.subTest(replicas=replicas):
+                with override_settings(DEBUG=True, DATABASE_REPLICAS=replicas), \
+                        self.assertLogs("django.request", "DEBUG") as logs:
+                    ASGIHandler()
+                # Middleware that drops out with MiddlewareNotUsed is adapted first, then discarded.
+                adapted = {re.search(r"middleware (\S+)\.$", line)[1] for line in logs.output if "adapted" in line}
+                unused = {re.search(r"MiddlewareNotUsed: '(\S+)'", line)[1] for line in logs.output if "NotUsed" in line}
+                self.assertEqual(adapted - unused, set())
+        self.assertNotIn("api.middleware.PrimaryDatabaseMiddleware", unused)
+
+        async def view(request):
+            return HttpResponse()
+
+        middleware = AdminOnlyMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        for hook in (middleware.process_view, middleware.process_template_response, middleware.process_exception):
+            self.assertTrue(iscoroutinefunction(hook))
+
+    async def test_admin_under_asgi(self):
+        client = AsyncClient(enforce_csrf_checks=True)
+        response = await client.get("/admin/login/")
+        self.assertEqual(response["X-Frame-Options"], "DENY")
+        self.assertIn("csrftoken", response.cookies)
+        credentials = {"username": "root", "password": "password123"}
+        self.assertEqual((await client.post("/admin/login/", credentials)).status_code, status.HTTP_403_FORBIDDEN)
+
+        response = await AsyncClient().get("/api/activities/")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertNotIn("X-Frame-Options", response)
+
+    def test_middleware_benchmark(self):
+        results = benchmark_middleware.run({"requests": 2, "logins": 1, "activities": 2}, io.StringIO())
+        self.assertEqual(set(results), {"classic:list", "classic:login", "api_only:list", "api_only:login"})
+
+
+class ColdStartTest(TestCase):
+    def test_warm_url_resolvers_compiles_patterns(self):
+        warm_url_resolvers()
+        self.assertIn("activity-list", get_resolver().reverse_dict)
+
+    def cold_start_settings(self, **env):
+        environ = {name: value for name, value in os.environ.items()
+                   if name not in settings.DATABASE_ENV_VARS + ["DATABASE_URL", "COLD_START_MODE"]}
+        script = (
+            "import sys; from fitness_backend import settings; "
+            "print(settings.COLD_START_MODE, settings.DATABASES['default']['NAME'], 'dotenv' in sys.modules)"
+        )
+        result = subprocess.run([sys.executable, "-c", script], env={**environ, **env}, cwd=settings.BASE_DIR,
+                                capture_output=True, text=True, check=True)
+        return result.stdout.split()
+
+    def test_database_settings_come_from_dotenv_unless_set(self):
+        cold_start, name, dotenv_loaded = self.cold_start_settings(VERCEL="1")
+        self.assertEqual(cold_start, "True")
+        self.assertNotEqual(name, "None")
+        self.assertEqual(dotenv_loaded, "True")
+
+        database = dict.fromkeys(settings.DATABASE_ENV_VARS, "from-env")
+        self.assertEqual(self.cold_start_settings(VERCEL="1", **database), ["True", "from-env", "False"])
+
+    def test_parse_importtime(self):
+        stderr = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |     django.utils\n"
+            "import time:       300 |        420 |   django\n"
+        )
+        self.assertEqual(parse_importtime(stderr), {"django.utils": 120, "django": 300})
+
+    def test_importtime_report_tracks_history(self):
+        with tempfile.TemporaryDirectory() as directory:
+            history = os.path.join(directory, "importtime.jsonl")
+            call_command("importtime_report", mode="cold", repeat=1, history=history, tolerance=100,
+                         stdout=io.StringIO())
+            stdout = io.StringIO()
+            call_command("importtime_report", mode="cold", repeat=1, history=history, tolerance=100, stdout=stdout)
+            with open(history) as lines:
+                entries = [json.loads(line) for line in lines]
+        self.assertEqual([entry["mode"] for entry in entries], ["cold", "cold"])
+        self.assertGreater(entries[0]["modules"], 100)
+        self.assertIn("django", entries[0]["packages_ms"])
+        self.assertIn("cold: ", stdout.getvalue())
+
+
+class ActivityBulkTest(TestCase):
+    url = "/api/activities/bulk/"
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="syncer", password="password123")
+        self.other = User.objects.create_user(username="other", password="password123")
+        self.client.force_authenticate(user=self.user)
+        self.to_update = Activity.objects.create(user=self.user, activity_type="steps", description="3000 steps", date=date(2025, 11, 1))
+        self.to_delete = Activity.objects.create(user=self.user, activity_type="meal", description="Lunch", date=date(2025, 11, 1))
+        self.foreign = Activity.objects.create(user=self.other, activity_type="meal", description="Not mine", date=date(2025, 11, 1))
+
+    def test_mixed_batch(self):
+        operations = [
+            {"op": "create", "data": {"activity_type": "workout", "description": "Gym", "date": "2025-11-02"}},
+            {"op": "update", "id": self.to_update.id, "data": {"status": "completed"}},
+            {"op": "delete", "id": self.to_delete.id},
+        ]
+        response = self.client.post(self.url, operations, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        results = response.data["results"]
+        self.assertEqual([r["status"] for r in results], [201, 200, 204])
+        self.assertEqual(results[0]["data"]["description"], "Gym")
+        self.assertTrue(Activity.objects.filter(id=results[0]["id"], user=self.user).exists())
+        self.to_update.refresh_from_db()
+        self.assertEqual(self.to_update.status, "completed")
+        self.assertFalse(Activity.objects.filter(id=self.to_delete.id).exists())
+
+    def test_invalid_item_rejects_whole_batch(self):
+        operations = [
+            {"op": "create", "data": {"activity_type": "workout", "date": "2025-11-02"}},
+            {"op": "create", "data": {"activity_type": "swimming", "date": "2025-11-02"}},
+            {"op": "delete", "id": self.to_delete.id},
+        ]
+        response = self.client.post(self.url, operations, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("activity_type", response.data["results"][1]["errors"])
+        self.assertEqual(Activity.objects.filter(user=self.user).count(), 2)
+
+    def test_missing_delete_rejects_whole_batch(self):
+        operations = [
+            {"op": "update", "id": self.to_update.id, "data": {"status": "completed"}},
+            {"op": "delete", "id": self.to_delete.id},
+            {"op": "delete", "id": 999999},
+        ]
+        response = self.client.post(self.url, operations, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["results"][2]["status"], 404)
+        self.assertIn("id", response.data["results"][2]["errors"])
+        self.to_update.refresh_from_db()
+        self.assertEqual(self.to_update.status, "planned")
+        self.assertTrue(Activity.objects.filter(id=self.to_delete.id).exists())
+
+    def test_cannot_touch_other_users_activities(self):
+        operations = [{"op": "update", "id": self.foreign.id, "data": {"description": "Hijacked"}}]
+        response = self.client.post(self.url, operations, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["results"][0]["status"], 404)
+
+        response = self.client.post(self.url, [{"op": "delete", "id": self.foreign.id}], format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["results"][0]["status"], 404)
+        self.assertTrue(Activity.objects.filter(id=self.foreign.id).exists())
+
+    def test_rows_removed_concurrently_roll_the_batch_back(self):
+        target = self.client.post("/api/activities/create/", {
+            "activity_type": "workout", "date": "2025-11-03", "status": "completed",
+        }, format="json").data["id"]
+        summary = list(DailyActivitySummary.objects.values_list("date", "activity_type", "status", "count"))
+        delete = QuerySet.delete
+
+        def removed_elsewhere(queryset):
+            # Another request deleted the rows first: nothing left for this one.
+            delete(queryset)
+            return 0, {}
+
+        operations = [
+            {"op": "create", "data": {"activity_type": "meal", "date": "2025-11-03"}},
+            {"op": "delete", "id": target},
+        ]
+        with mock.patch.object(QuerySet, "delete", removed_elsewhere):
+            response = self.client.post(self.url, operations, format="json")
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertTrue(Activity.objects.filter(id=target).exists())
+        self.assertFalse(Activity.objects.filter(user=self.user, activity_type="meal", date=date(2025, 11, 3)).exists())
+        self.assertEqual(
+            list(DailyActivitySummary.objects.values_list("date", "activity_type", "status", "count")), summary,
+        )
+
+    def test_deletes_are_a_single_statement(self):
+        activities = Activity.objects.bulk_create(
+            Activity(user=self.user, activity_type="steps", date=date(2025, 11, 3)) for _ in range(50)
+        )
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, [{"op": "delete", "id": a.id} for a in activities], format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        statements = [query["sql"] for query in queries if 'FROM "api_activity"' in query["sql"]]
+        # The locking read of the batch, then the DELETE without re-selecting the rows
+        self.assertEqual(len(statements), 2)
+        self.assertTrue(statements[1].startswith('DELETE FROM "api_activity"'))
+
+    def test_query_count_does_not_grow_with_batch_size(self):
+        def sync(size):
+            ids = list(
+                Activity.objects.bulk_create(
+                    Activity(user=self.user, activity_type="steps", date=date(2025, 11, 3)) for _ in range(2 * size)
+                )
+            )
+            operations = (
+                [{"op": "create", "data": {"activity_type": "workout", "date": "2025-11-03"}} for _ in range(size)]
+                + [{"op": "update", "id": a.id, "data": {"status": "completed"}} for a in ids[:size]]
+                + [{"op": "delete", "id": a.id} for a in ids[size:]]
+            )
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(self.url, operations, format="json")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return len(queries)
+
+        sync(1)  # first sync creates the summary rows
+        self.assertEqual(sync(5), sync(50))
+
+
+class ActivityStatsTest(TestCase):
+    url = "/api/activities/stats/"
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="statsuser", password="password123")
+        self.other = User.objects.create_user(username="other", password="password123")
+        self.client.force_authenticate(user=self.user)
+        rows = [
+            ("workout", "completed", date(2025, 11, 3)),   # Monday
+            ("workout", "completed", date(2025, 11, 4)),
+            ("workout", "planned", date(2025, 11, 4)),
+            ("meal", "completed", date(2025, 11, 10)),     # next week
+            ("steps", "completed", date(2025, 12, 1)),     # next month
+        ]
+        for activity_type, activity_status, day in rows:
+            Activity.objects.create(user=self.user, activity_type=activity_type, status=activity_status, date=day)
+        Activity.objects.create(user=self.other, activity_type="workout", status="completed", date=date(2025, 11, 3))
+
+    def test_weekly_rollup(self):
+        response = self.client.get(self.url, {"period": "week", "start": "2025-11-01", "end": "2025-11-30"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["buckets"], [
+            {"period": "2025-11-03", "activity_type": "workout", "status": "completed", "count": 2},
+            {"period": "2025-11-03", "activity_type": "workout", "status": "planned", "count": 1},
+            {"period": "2025-11-10", "activity_type": "meal", "status": "completed", "count": 1},
+        ])
+
+    def test_monthly_rollup_is_one_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, {"period": "month"})
+        periods = {(b["period"], b["activity_type"], b["status"]): b["count"] for b in response.data["buckets"]}
+        self.assertEqual(periods, {
+            ("2025-11-01", "meal", "completed"): 1,
+            ("2025-11-01", "workout", "completed"): 2,
+            ("2025-11-01", "workout", "planned"): 1,
+            ("2025-12-01", "steps", "completed"): 1,
+        })
+
+    def test_invalid_range(self):
+        response = self.client.get(self.url, {"start": "2025-12-01", "end": "2025-11-01"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class DailyActivitySummaryTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="summary", password="password123")
+        self.client.force_authenticate(user=self.user)
+
+    def summary(self):
+        return {
+            (row.date.isoformat(), row.activity_type, row.status): row.count
+            for row in DailyActivitySummary.objects.filter(user=self.user)
+        }
+
+    def create(self, **data):
+        payload = {"activity_type": "workout", "date": "2025-11-03", "status": "planned"} | data
+        response = self.client.post("/api/activities/create/", payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data["id"]
+
+    def test_write_paths_keep_summary_in_step(self):
+        first = self.create()
+        self.create()
+        self.assertEqual(self.summary(), {("2025-11-03", "workout", "planned"): 2})
+
+        self.client.patch(f"/api/activities/{first}/", {"status": "completed", "date": "2025-11-04"}, format="json")
+        self.assertEqual(self.summary(), {
+            ("2025-11-03", "workout", "planned"): 1,
+            ("2025-11-04", "workout", "completed"): 1,
+        })
+
+        self.client.delete(f"/api/activities/{first}/")
+        self.assertEqual(self.summary(), {("2025-11-03", "workout", "planned"): 1})
+
+    def test_bulk_path_keeps_summary_in_step(self):
+        keep = self.create()
+        drop = self.create(activity_type="meal")
+        operations = [
+            {"op": "create", "data": {"activity_type": "steps", "date": "2025-11-05"}},
+            {"op": "update", "id": keep, "data": {"status": "completed"}},
+            {"op": "delete", "id": drop},
+        ]
+        self.client.post("/api/activities/bulk/", operations, format="json")
+        self.assertEqual(self.summary(), {
+            ("2025-11-03", "workout", "completed"): 1,
+            ("2025-11-05", "steps", "planned"): 1,
+        })
+
+    def test_rebuild_command_matches_incremental_summary(self):
+        self.create()
+        self.create(status="completed")
+        self.create(date="2025-11-20")
+        incremental = self.summary()
+
+        # Rows written behind the service layer's back are picked up by a rebuild
+        DailyActivitySummary.objects.all().delete()
+        call_command("rebuild_activity_summaries", batch_size=1, stdout=io.StringIO())
+        self.assertEqual(self.summary(), incremental)
+
+    def test_stale_instances_do_not_apply_deltas_twice(self):
+        today = date.today().isoformat()
+        first = self.create(status="completed", date=today)
+        self.create(status="completed", date=today)
+        derived = lambda: (
+            self.summary(),
+            list(StreakRun.objects.filter(user=self.user).values_list("length", flat=True)),
+            list(LeaderboardScore.objects.filter(user=self.user).values_list("score", flat=True)),
+        )
+
+        # Two requests that loaded the same row before either wrote
+        stale = [Activity.objects.get(pk=first), Activity.objects.get(pk=first)]
+        delete_activity(self.user, stale[0])
+        with self.assertRaises(NotFound):
+            delete_activity(self.user, stale[1])
+        self.assertEqual(derived(), ({(today, "workout", "completed"): 1}, [1], [1]))
+
+        second = Activity.objects.get(user=self.user)
+        stale = Activity.objects.get(pk=second.pk)
+        serializer = ActivitySerializer(second, data={"status": "planned"}, partial=True)
+        serializer.is_valid(raise_exception=True)
+        update_activity(self.user, serializer)
+        serializer = ActivitySerializer(stale, data={"description": "edited"}, partial=True)
+        serializer.is_valid(raise_exception=True)
+        update_activity(self.user, serializer)
+        self.assertEqual(derived(), ({(today, "workout", "planned"): 1}, [], []))
+        self.assertEqual(Activity.objects.get(pk=second.pk).status, "planned")
+
+    def test_calendar_reads_summary(self):
+        self.create()
+        self.create(date="2025-12-01")
+        response = self.client.get("/api/activities/calendar/", {"month": "2025-11"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["days"], [
+            {"date": "2025-11-03", "activity_type": "workout", "status": "planned", "count": 1},
+        ])
+
+        response = self.client.get("/api/activities/calendar/", {"month": "November"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class StreakAndGoalTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="streaker", password="password123")
+        self.client.force_authenticate(user=self.user)
+
+    def create(self, day, activity_type="workout", status="completed"):
+        response = self.client.post("/api/activities/create/", {
+            "activity_type": activity_type, "date": day.isoformat(), "status": status,
+        }, format="json")
+        self.assertEqual(response.status_code, 201)
+        return response.data["id"]
+
+    def runs(self):
+        return {
+            (run.activity_type, run.start_date.day, run.end_date.day, run.length)
+            for run in StreakRun.objects.filter(user=self.user)
+        }
+
+    def assert_runs(self, expected):
+        self.assertEqual(self.runs(), expected)
+        # The incremental state matches a rebuild from the activities.
+        StreakRun.objects.all().delete()
+        call_command("rebuild_activity_streaks", batch_size=1, stdout=io.StringIO())
+        self.assertEqual(self.runs(), expected)
+
+    def test_rebuild_reads_days_after_locking_the_users(self):
+        self.create(date(2025, 3, 1))
+
+        def write_then_lock(user_ids):
+            # An activity committed while the rebuild waits for the lock.
+            self.create(date(2025, 3, 2))
+            lock_users(user_ids)
+
+        with mock.patch("api.management.commands.rebuild_activity_streaks.lock_users", side_effect=write_then_lock):
+            call_command("rebuild_activity_streaks", stdout=io.StringIO())
+        self.assertEqual(self.runs(), {("workout", 1, 2, 2)})
+
+    def test_runs_follow_creates_edits_and_deletes(self):
+        day = lambda n: date(2025, 3, n)
+        self.create(day(1))
+        second = self.create(day(2))
+        fourth = self.create(day(4))
+        self.create(day(4), activity_type="meal")
+        self.create(day(5), status="planned")
+        self.assert_runs({("workout", 1, 2, 2), ("workout", 4, 4, 1), ("meal", 4, 4, 1)})
+
+        third = self.create(day(3))
+        extra = self.create(day(3))
+        self.assert_runs({("workout", 1, 4, 4), ("meal", 4, 4, 1)})
+
+        # A day stays active while any completed activity remains on it
+        self.client.delete(f"/api/activities/{extra}/")
+        self.assert_runs({("workout", 1, 4, 4), ("meal", 4, 4, 1)})
+
+        self.client.patch(f"/api/activities/{second}/", {"status": "planned"}, format="json")
+        self.assert_runs({("workout", 1, 1, 1), ("workout", 3, 4, 2), ("meal", 4, 4, 1)})
+
+        # Back-dating moves the day out of one run and into another
+        self.client.patch(f"/api/activities/{fourth}/", {"date": "2025-03-02"}, format="json")
+        self.assert_runs({("workout", 1, 3, 3), ("meal", 4, 4, 1)})
+
+        self.client.patch(f"/api/activities/{third}/", {"activity_type": "meal"}, format="json")
+        self.assert_runs({("workout", 1, 2, 2), ("meal", 3, 4, 2)})
+
+    def test_bulk_path_updates_runs(self):
+        first = self.create(date(2025, 3, 1))
+        self.create(date(2025, 3, 3))
+        self.client.post("/api/activities/bulk/", [
+            {"op": "create", "data": {"activity_type": "workout", "date": "2025-03-02", "status": "completed"}},
+            {"op": "delete", "id": first},
+        ], format="json")
+        self.assert_runs({("workout", 2, 3, 2)})
+
+    def test_progress_reads_current_and_longest_streaks(self):
+        today = date.today()
+        for n in range(10, 15):
+            self.create(today - timedelta(days=n))
+        for n in range(1, 4):
+            self.create(today - timedelta(days=n))
+        self.create(today - timedelta(days=1), activity_type="meal")
+
+        with self.assertNumQueries(6):
+            response = self.client.get("/api/activities/progress/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        streaks = {row["activity_type"]: row for row in response.data["streaks"]}
+        self.assertEqual((streaks["workout"]["current"], streaks["workout"]["longest"]), (3, 5))
+        self.assertEqual(streaks["workout"]["current_start"], today - timedelta(days=3))
+        self.assertEqual(streaks["workout"]["longest_end"], today - timedelta(days=10))
+        self.assertEqual((streaks["meal"]["current"], streaks["meal"]["longest"]), (1, 1))
+        self.assertEqual((streaks["steps"]["current"], streaks["steps"]["longest"]), (0, 0))
+
+        self.create(today)
+        streaks = {row["activity_type"]: row for row in self.client.get("/api/activities/progress/").data["streaks"]}
+        self.assertEqual(streaks["workout"]["current"], 4)
+
+    def test_weekly_goals(self):
+        response = self.client.post("/api/goals/", {"activity_type": "workout", "target": 2}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = self.client.post("/api/goals/", {"activity_type": "workout", "target": 3}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(WeeklyGoal.objects.get(user=self.user).target, 3)
+        response = self.client.post("/api/goals/", {"activity_type": "meal", "target": 0}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        today = date.today()
+        self.create(today)
+        self.create(today)
+        self.create(today, status="planned")
+        self.create(today - timedelta(days=today.weekday() + 1))  # last week
+        goals = self.client.get("/api/activities/progress/").data["goals"]
+        self.assertEqual(goals, [
+            {"activity_type": "workout", "target": 3, "completed": 2, "remaining": 1, "achieved": False},
+        ])
+
+        self.client.patch("/api/goals/workout/", {"target": 2, "activity_type": "meal"}, format="json")
+        self.assertEqual(self.client.get("/api/goals/").data, [
+            dict(self.client.get("/api/goals/workout/").data, target=2, activity_type="workout"),
+        ])
+        self.assertTrue(self.client.get("/api/activities/progress/").data["goals"][0]["achieved"])
+
+        self.assertEqual(self.client.delete("/api/goals/workout/").status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self.client.get("/api/goals/").data, [])
+
+
+@skipUnlessDBFeature("has_select_for_update")
+class StreakConcurrencyTest(TransactionTestCase):
+    def test_adjacent_days_added_concurrently_form_one_run(self):
+        user = User.objects.create_user(username="racer")
+        barrier = threading.Barrier(2, timeout=10)
+        lock_user = services.lock_user
+        errors = []
+
+        def lock_once_both_have_written(locked_user):
+            # Neither transaction reads the runs before the other has written
+            # its day, the interleaving that used to leave two touching runs.
+            barrier.wait()
+            lock_user(locked_user)
+
+        def add(day):
+            try:
+                serializer = ActivitySerializer(data={"activity_type": "workout", "date": day, "status": "completed"})
+                serializer.is_valid(raise_exception=True)
+                create_activity(user, serializer)
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        with mock.patch.object(services, "lock_user", lock_once_both_have_written):
+            threads = [threading.Thread(target=add, args=(day,)) for day in ("2025-03-01", "2025-03-02")]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(list(StreakRun.objects.values_list("start_date", "end_date", "length")),
+                         [(date(2025, 3, 1), date(2025, 3, 2), 2)])
+
+
+class BackfillMigrationTest(TransactionTestCase):
+    def migrate(self, target):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate([("api", target)])
+        return executor.loader.project_state([("api", target)]).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def create_history(self, migration, days):
+        """
+        Completed workouts `days` days ago and a planned meal today, written
+        while the schema is at `migration`, before the backfill under test
+        ran, so the derived table has no row for them yet.
+        """
+        apps = self.migrate(migration)
+        Activity = apps.get_model("api", "Activity")
+        user = apps.get_model("auth", "User").objects.create(username="veteran")
+        today = date.today()
+        Activity.objects.bulk_create([
+            Activity(user_id=user.pk, activity_type="workout", status="completed", date=today - timedelta(days=n))
+            for n in days
+        ] + [
+            Activity(user_id=user.pk, activity_type="meal", status="planned", date=today),
+        ])
+        return today
+
+    def test_streak_runs(self):
+        self.create_history("0009_activity_distance_finite", days=(0, 1, 2, 2, 10))
+        self.migrate("0010_backfill_streak_runs")
+        self.assertEqual(sorted(StreakRun.objects.values_list("length", flat=True)), [1, 3])
+
+    def test_daily_summaries(self):
+        today = self.create_history("0010_backfill_streak_runs", days=(0, 2, 2))
+        self.migrate("0011_backfill_daily_summaries")
+        self.assertEqual(
+            set(DailyActivitySummary.objects.values_list("date", "activity_type", "status", "count")),
+            {(today, "workout", "completed", 1), (today - timedelta(days=2), "workout", "completed", 2),
+             (today, "meal", "planned", 1)},
+        )
+
+    def test_leaderboard_scores(self):
+        retained = 7 * settings.LEADERBOARD_RETENTION_WEEKS
+        today = self.create_history("0011_backfill_daily_summaries", days=(0, 1, 7, 7, retained + 7))
+        self.migrate("0012_backfill_leaderboard_scores")
+        scores = Counter(services.week_start(today - timedelta(days=n)) for n in (0, 1, 7, 7))
+        self.assertEqual(dict(LeaderboardScore.objects.values_list("period_start", "score")), dict(scores))
+
+
+class LeaderboardTest(TestCase):
+    def setUp(self):
+        self.today = date.today()
+        self.clients = {}
+        for name in ("ann", "bob", "cy", "dee"):
+            client = APIClient()
+            client.force_authenticate(user=User.objects.create_user(username=name, password="password123"))
+            self.clients[name] = client
+
+    def create(self, name, day=None, activity_type="workout", status="completed"):
+        response = self.clients[name].post("/api/activities/create/", {
+            "activity_type": activity_type, "date": (day or self.today).isoformat(), "status": status,
+        }, format="json")
+        self.assertEqual(response.status_code, 201)
+        return response.data["id"]
+
+    def board(self, name="ann", **params):
+        response = self.clients[name].get("/api/leaderboards/", params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def scores(self):
+        return set(LeaderboardScore.objects.values_list("period_start", "activity_type", "user__username", "score"))
+
+    def test_ranks_follow_writes(self):
+        for name, count in (("ann", 2), ("bob", 3), ("cy", 2)):
+            for _ in range(count):
+                self.create(name)
+        self.create("ann", status="planned")
+        self.create("dee", activity_type="steps")
+
+        with self.assertNumQueries(3):
+            board = self.board()
+        self.assertEqual(board["week_start"], self.today - timedelta(days=self.today.weekday()))
+        self.assertEqual(board["entries"], [
+            {"rank": 1, "username": "bob", "score": 3},
+            {"rank": 2, "username": "ann", "score": 2},
+            {"rank": 2, "username": "cy", "score": 2},
+        ])
+        self.assertEqual(board["me"], {"rank": 2, "score": 2})
+        self.assertEqual(self.board("dee")["me"], {"rank": None, "score": 0})
+        self.assertEqual(self.board("dee", activity_type="steps")["entries"],
+                         [{"rank": 1, "username": "dee", "score": 1}])
+        self.assertEqual(len(self.board(limit=1)["entries"]), 1)
+
+        # Status flips, back-dating and deletes move the scores
+        extra = self.create("cy")
+        self.clients["cy"].patch(f"/api/activities/{extra}/", {"status": "planned"}, format="json")
+        self.assertEqual(self.board("cy")["me"], {"rank": 2, "score": 2})
+        moved = self.create("cy")
+        last_week = self.today - timedelta(days=7)
+        self.clients["cy"].patch(f"/api/activities/{moved}/", {"date": last_week.isoformat()}, format="json")
+        self.assertEqual(self.board("cy")["me"]["score"], 2)
+        self.assertEqual(self.board("cy", week=last_week.isoformat())["me"], {"rank": 1, "score": 1})
+        self.clients["cy"].delete(f"/api/activities/{moved}/")
+        self.assertEqual(self.board(week=last_week.isoformat())["entries"], [])
+
+        incremental = self.scores()
+        LeaderboardScore.objects.all().delete()
+        call_command("rebuild_leaderboards", stdout=io.StringIO())
+        self.assertEqual(self.scores(), incremental)
+
+    def test_rebuild_counts_after_locking_the_users(self):
+        self.create("ann")
+
+        def write_then_lock(user_ids):
+            # An activity committed while the rebuild waits for the lock.
+            self.create("ann")
+            lock_users(user_ids)
+
+        with mock.patch("api.management.commands.rebuild_leaderboards.lock_users", side_effect=write_then_lock):
+            call_command("rebuild_leaderboards", batch_size=1000, stdout=io.StringIO())
+        self.assertEqual(self.board("ann")["me"], {"rank": 1, "score": 2})
+
+    @override_settings(LEADERBOARD_RETENTION_WEEKS=2)
+    def test_old_weeks_expire(self):
+        expired = self.today - timedelta(weeks=2)
+        self.create("ann", day=expired)
+        self.assertEqual(self.scores(), set())
+
+        LeaderboardScore.objects.create(period_start=expired - timedelta(days=expired.weekday()),
+                                        activity_type="workout", user=User.objects.get(username="ann"), score=1)
+        self.create("ann")
+        call_command("prune_leaderboards", stdout=io.StringIO())
+        self.assertEqual([row[3] for row in self.scores()], [1])
+
+        response = self.clients["ann"].get("/api/leaderboards/", {"week": expired.isoformat()})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.clients["ann"].get("/api/leaderboards/", {"limit": 1000})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ConditionalGetTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="poller", password="password123")
+        self.client.force_authenticate(user=self.user)
+        self.activity = Activity.objects.create(user=self.user, activity_type="workout", date=date(2025, 11, 3))
+
+    def test_list_etag_round_trip(self):
+        response = self.client.get("/api/activities/")
+        etag = response["ETag"]
+
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/activities/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b"")
+
+        # Deletions change the validator even though no timestamp moves forward
+        Activity.objects.create(user=self.user, activity_type="meal", date=date(2025, 11, 1))
+        response = self.client.get("/api/activities/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response["ETag"]
+        Activity.objects.filter(activity_type="meal").delete()
+        response = self.client.get("/api/activities/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_list_etag_depends_on_query(self):
+        first = self.client.get("/api/activities/")["ETag"]
+        paged = self.client.get("/api/activities/?page_size=1")["ETag"]
+        self.assertNotEqual(first, paged)
+
+    def test_detail_conditional_get(self):
+        url = f"/api/activities/{self.activity.id}/"
+        response = self.client.get(url)
+        self.assertIn("Last-Modified", response)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        last_modified = self.client.get(url)["Last-Modified"]
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        etag = self.client.get(url)["ETag"]
+        self.client.patch(url, {"status": "completed"}, format="json")
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["status"], "completed")
+
+    def test_missing_detail_is_still_404(self):
+        response = self.client.get("/api/activities/999999/", HTTP_IF_NONE_MATCH='"abc"')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+@override_settings(ACTIVITY_RESPONSE_CACHE_TIMEOUT=60)
+class ActivityResponseCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="reader", password="password123")
+        self.client.force_authenticate(user=self.user)
+        self.activity = Activity.objects.create(user=self.user, activity_type="workout", date=date(2025, 11, 3))
+
+    def test_repeat_reads_skip_the_database(self):
+        first = self.client.get("/api/activities/")
+        with self.assertNumQueries(0):
+            second = self.client.get("/api/activities/")
+        self.assertEqual(first.json(), second.json())
+
+        detail = f"/api/activities/{self.activity.id}/"
+        etag = self.client.get(detail)["ETag"]
+        with self.assertNumQueries(0):
+            response = self.client.get(detail, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_writes_invalidate_cached_reads(self):
+        detail = f"/api/activities/{self.activity.id}/"
+        self.client.get("/api/activities/")
+        self.client.get(detail)
+
+        self.client.patch(detail, {"status": "completed"}, format="json")
+        self.assertEqual(self.client.get(detail).data["status"], "completed")
+        self.assertEqual(self.client.get("/api/activities/").data[0]["status"], "completed")
+
+        self.client.post("/api/activities/create/", {"activity_type": "meal", "date": "2025-11-04"}, format="json")
+        self.assertEqual(len(self.client.get("/api/activities/").data), 2)
+
+        self.client.post("/api/activities/bulk/", [{"op": "delete", "id": self.activity.id}], format="json")
+        self.assertEqual(len(self.client.get("/api/activities/").data), 1)
+
+        remaining = self.client.get("/api/activities/").data[0]["id"]
+        self.client.delete(f"/api/activities/{remaining}/")
+        self.assertEqual(self.client.get("/api/activities/").data, [])
+
+    def test_deletes_outside_the_api_invalidate_cached_reads(self):
+        self.client.get("/api/activities/")
+        Activity.objects.get(pk=self.activity.pk).delete()
+        self.assertEqual(self.client.get("/api/activities/").data, [])
+
+    def test_cache_is_per_user(self):
+        self.client.get("/api/activities/")
+        other = User.objects.create_user(username="someone", password="password123")
+        self.client.force_authenticate(user=other)
+        self.assertEqual(self.client.get("/api/activities/").data, [])
+
+
+# The routes ASYNC_ACTIVITY_VIEWS swaps in, for requests that go through the middleware
+class AsyncViewsURLConf:
+    urlpatterns = [
+        path("api/auth/register/", AsyncRegisterView.as_view()),
+        path("api/auth/login/", AsyncTokenObtainPairView.as_view()),
+        path("api/activities/create/", AsyncActivityCreateView.as_view()),
+    ]
+
+
+class AsyncActivityViewsTest(TestCase):
+    def setUp(self):
+        self.factory = AsyncRequestFactory()
+        self.user = User.objects.create_user(username="async", password="password123")
+        self.auth = {"headers": {"Authorization": f"Bearer {RefreshToken.for_user(self.user).access_token}"}}
+        self.activity = Activity.objects.create(user=self.user, activity_type="workout", date=date(2025, 11, 3))
+
+    async def test_list_and_paginate(self):
+        await Activity.objects.acreate(user=self.user, activity_type="meal", date=date(2025, 11, 4))
+        view = AsyncActivityListView.as_view()
+
+        response = await view(self.factory.get("/api/activities/", **self.auth))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([a["activity_type"] for a in json.loads(response.content)], ["meal", "workout"])
+
+        response = await view(self.factory.get("/api/activities/", {"page_size": 1}, **self.auth))
+        body = json.loads(response.content)
+        self.assertEqual(len(body["results"]), 1)
+        self.assertIn("cursor=", body["next"])
+
+        response = await view(self.factory.get("/api/activities/", {"fields": "activity_type", "layout": "columnar"},
+                                               **self.auth))
+        self.assertEqual(json.loads(response.content), {"fields": ["activity_type"], "rows": [["meal"], ["workout"]]})
+
+    async def test_create_update_delete(self):
+        create = AsyncActivityCreateView.as_view()
+        detail = AsyncActivityDetailView.as_view()
+
+        request = self.factory.post("/api/activities/create/", {"activity_type": "steps", "date": "2025-11-05"},
+                                    content_type="application/json", **self.auth)
+        response = await create(request)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        created = json.loads(response.content)["id"]
+
+        request = self.factory.patch(f"/api/activities/{created}/", {"status": "completed"},
+                                     content_type="application/json", **self.auth)
+        response = await detail(request, pk=created)
+        self.assertEqual(json.loads(response.content)["detail"], "Activity updated successfully!")
+        self.assertEqual((await Activity.objects.aget(pk=created)).status, "completed")
+        self.assertTrue(await DailyActivitySummary.objects.filter(user=self.user, status="completed").aexists())
+
+        response = await detail(self.factory.delete(f"/api/activities/{created}/", **self.auth), pk=created)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(await Activity.objects.filter(pk=created).aexists())
+
+    @override_settings(
+        ROOT_URLCONF=AsyncViewsURLConf,
+        MIDDLEWARE=["django.contrib.sessions.middleware.SessionMiddleware", "django.middleware.csrf.CsrfViewMiddleware"],
+        PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+    )
+    def test_csrf_checks_do_not_apply(self):
+        # Like DRF's views: JWT requests carry no CSRF cookie or token.
+        client = Client(enforce_csrf_checks=True)
+        response = client.post("/api/auth/register/", {
+            "username": "tokenonly", "email": "tokenonly@example.com", "first_name": "Token", "last_name": "Only",
+            "password": "StrongPass123", "password2": "StrongPass123",
+        }, content_type="application/json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        response = client.post("/api/auth/login/", {"username": "tokenonly", "password": "StrongPass123"},
+                               content_type="application/json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = client.post("/api/activities/create/", {"activity_type": "steps", "date": "2025-11-05"},
+                               content_type="application/json", **self.auth)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    async def test_errors(self):
+        detail = AsyncActivityDetailView.as_view()
+        response = await detail(self.factory.get("/api/activities/1/"), pk=self.activity.id)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertIn("WWW-Authenticate", response)
+
+        response = await detail(self.factory.get("/api/activities/999999/", **self.auth), pk=999999)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        request = self.factory.post("/api/activities/create/", {"activity_type": "swimming"},
+                                    content_type="application/json", **self.auth)
+        response = await AsyncActivityCreateView.as_view()(request)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("activity_type", json.loads(response.content))
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class BenchmarkSuiteTest(TestCase):
+    def test_percentiles(self):
+        latencies = [n / 1000 for n in range(1, 101)]
+        summary = summarize(latencies, queries=[2, 4], elapsed=2.0)
+        self.assertEqual((summary["p50_ms"], summary["p95_ms"], summary["p99_ms"]), (50.0, 95.0, 99.0))
+        self.assertEqual(summary["rps"], 50.0)
+        self.assertEqual(summary["queries_per_request"], 3.0)
+
+    def test_api_suite_runs_in_process(self):
+        options = {"users": 1, "activities": 3, "requests": 2, "transport": "client", "url": None,
+                   "operations": ["login", "list", "detail", "create", "update", "delete"]}
+        results = benchmark_api.run(options, io.StringIO())
+        self.assertEqual(set(results), set(options["operations"]))
+        self.assertEqual(results["list"]["count"], 2)
+        self.assertIsNotNone(results["list"]["queries_per_request"])
+
+    def test_db_connections_suite(self):
+        stdout = io.StringIO()
+        results = benchmark_db_connections.run({"requests": 3, "modes": ["fresh", "persistent", "pool"]}, stdout)
+        self.assertEqual(set(results), {"fresh", "persistent"})
+        self.assertIn("Skipping pool", stdout.getvalue())
+
+    def test_compare_flags_regressions(self):
+        baseline = {"results": {"list": {"p95_ms": 10.0, "queries_per_request": 2}}}
+        self.assertEqual(compare({"list": {"p95_ms": 11.0, "queries_per_request": 2}}, baseline, 0.2), [])
+        self.assertEqual(len(compare({"list": {"p95_ms": 13.0, "queries_per_request": 3}}, baseline, 0.2)), 2)
+
+
+class QueryInstrumentationTest(TestCase):
+    def setUp(self):
+        endpoint_metrics.reset()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="measured", password="password123")
+        self.client.force_authenticate(user=self.user)
+        Activity.objects.create(user=self.user, activity_type="workout", date=date(2025, 11, 3))
+
+    def test_disabled_by_default(self):
+        response = self.client.get("/api/activities/")
+        self.assertNotIn("Server-Timing", response)
+        self.assertEqual(endpoint_metrics.snapshot(), {})
+
+    @override_settings(QUERY_INSTRUMENTATION=True)
+    def test_records_per_endpoint_metrics(self):
+        response = self.client.get("/api/activities/")
+        self.assertIn('desc="2 queries"', response["Server-Timing"])
+        self.client.get("/api/activities/")
+
+        stats = endpoint_metrics.snapshot()["activity-list"]
+        self.assertEqual(stats["requests"], 2)
+        self.assertEqual(stats["queries_per_request"], 2)
+        self.assertIn("api_activity", stats["slowest_query"])
+        self.assertEqual(sum(stats["histogram_ms"].values()), 2)
+
+    @override_settings(QUERY_INSTRUMENTATION=True)
+    def test_lean_serialization_is_timed_apart_from_the_view(self):
+        response = self.client.get("/api/activities/")
+        self.assertIn("serialize;dur=", response["Server-Timing"])
+        self.assertGreater(endpoint_metrics.snapshot()["activity-list"]["avg_serialize_ms"], 0)
+
+    @override_settings(QUERY_INSTRUMENTATION=True)
+    def test_streaming_export_queries_are_recorded(self):
+        response = self.client.get("/api/activities/export/?format=ndjson")
+        self.assertNotIn("activity-export", endpoint_metrics.snapshot())
+
+        b"".join(response.streaming_content)
+        stats = endpoint_metrics.snapshot()["activity-export"]
+        self.assertEqual(stats["requests"], 1)
+        self.assertGreaterEqual(stats["queries_per_request"], 1)
+        self.assertIn("api_activity", stats["slowest_query"])
+
+    @override_settings(QUERY_INSTRUMENTATION=True, JWT_USER_CACHE_TTL=0)
+    async def test_asgi_export_queries_are_recorded(self):
+        token = AccessToken.for_user(self.user)
+        response = await AsyncClient().get("/api/activities/export/", headers={"Authorization": f"Bearer {token}"})
+        [chunk async for chunk in response.streaming_content]
+
+        # The user lookup, then the rows, read in the request's thread while streaming
+        self.assertEqual(endpoint_metrics.snapshot()["activity-export"]["queries_per_request"], 2)
+
+    @override_settings(QUERY_INSTRUMENTATION=True)
+    def test_metrics_endpoint_is_admin_only(self):
+        self.client.get("/api/activities/")
+        self.assertEqual(self.client.get("/api/ops/query-metrics/").status_code, status.HTTP_403_FORBIDDEN)
+
+        admin = User.objects.create_superuser(username="admin", password="password123")
+        self.client.force_authenticate(user=admin)
+        response = self.client.get("/api/ops/query-metrics/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("activity-list", response.data["endpoints"])
+
+
+@override_settings(DATABASE_REPLICAS=["replica"])
+class ReadReplicaRoutingTest(TransactionTestCase):
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="replicated", password="password123")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(self.user).access_token}")
+        self.activity = Activity.objects.create(user=self.user, activity_type="workout", date=date(2025, 11, 3))
+
+    def activity_queries(self, alias, method, *args, **kwargs):
+        with CaptureQueriesContext(connections[alias]) as queries:
+            response = getattr(self.client, method)(*args, **kwargs)
+        self.assertLess(response.status_code, 400)
+        return [q["sql"] for q in queries.captured_queries if "api_activity" in q["sql"]]
+
+    def test_reads_go_to_the_replica(self):
+        self.assertTrue(self.activity_queries("replica", "get", "/api/activities/"))
+        self.assertFalse(self.activity_queries("default", "get", "/api/activities/"))
+        self.assertTrue(self.activity_queries("replica", "get", "/api/activities/stats/"))
+
+    def test_writing_requests_read_from_the_primary(self):
+        url = f"/api/activities/{self.activity.id}/"
+        self.assertFalse(self.activity_queries("replica", "patch", url, {"status": "completed"}, format="json"))
+
+    def test_reads_stick_to_the_primary_after_a_write(self):
+        self.client.post("/api/activities/create/", {"activity_type": "meal", "date": "2025-11-04"}, format="json")
+        self.assertFalse(self.activity_queries("replica", "get", "/api/activities/"))
+
+        cache.delete(pin_key(self.user.pk))
+        self.assertTrue(self.activity_queries("replica", "get", "/api/activities/"))
+
+    async def test_writing_requests_are_pinned_under_asgi(self):
+        async def view(request):
+            return HttpResponse(router.db_for_read(Activity))
+
+        middleware = PrimaryDatabaseMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        factory = AsyncRequestFactory()
+        self.assertEqual((await middleware(factory.post("/api/activities/create/"))).content, b"default")
+        self.assertEqual((await middleware(factory.get("/api/activities/"))).content, b"replica")
+
+    def test_transactions_read_from_the_primary(self):
+        self.assertEqual(router.db_for_read(Activity), "replica")
+        with transaction.atomic():
+            self.assertEqual(router.db_for_read(Activity), "default")
+        self.assertEqual(router.db_for_write(Activity), "default")
+
+    def test_replicas_require_a_shared_cache(self):
+        self.assertEqual([error.id for error in check_replica_pin_cache(None)], ["api.E001"])
+        shared = {"default": {"BACKEND": "django.core.cache.backends.db.DatabaseCache", "LOCATION": "cache"}}
+        with override_settings(CACHES=shared):
+            self.assertEqual(check_replica_pin_cache(None), [])
+        with override_settings(DATABASE_REPLICAS=[]):
+            self.assertEqual(check_replica_pin_cache(None), [])
+
+
+class ActivityFilterTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="filterer", password="password123")
+        self.client.force_authenticate(user=self.user)
+        rows = [
+            ("workout", "completed", date(2025, 11, 3), "Morning run"),
+            ("workout", "planned", date(2025, 11, 20), "Evening RUN"),
+            ("meal", "completed", date(2025, 11, 4), "Lunch"),
+            ("workout", "completed", date(2025, 10, 30), "Gym"),
+        ]
+        for activity_type, activity_status, day, description in rows:
+            Activity.objects.create(user=self.user, activity_type=activity_type, status=activity_status,
+                                    date=day, description=description)
+
+    def descriptions(self, params, url="/api/activities/"):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [a["description"] for a in response.data]
+
+    def test_completed_workouts_this_month(self):
+        params = {"activity_type": "workout", "status": "completed", "date__gte": "2025-11-01", "date__lte": "2025-11-30"}
+        self.assertEqual(self.descriptions(params), ["Morning run"])
+
+    def test_description_search(self):
+        self.assertEqual(self.descriptions({"search": "run"}), ["Evening RUN", "Morning run"])
+
+    def test_filters_combine_with_pagination(self):
+        response = self.client.get("/api/activities/", {"activity_type": "workout", "page_size": 2})
+        self.assertEqual([a["description"] for a in response.data["results"]], ["Evening RUN", "Morning run"])
+        response = self.client.get(response.data["next"])
+        self.assertEqual([a["description"] for a in response.data["results"]], ["Gym"])
+
+    def test_filtered_etag_differs(self):
+        self.assertNotEqual(
+            self.client.get("/api/activities/")["ETag"],
+            self.client.get("/api/activities/", {"status": "planned"})["ETag"],
+        )
+
+    def test_invalid_filter(self):
+        response = self.client.get("/api/activities/", {"status": "finished"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("status", response.data)
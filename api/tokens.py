@@ -0,0 +1,21 @@
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .blacklist import blacklist_filter
+
+
+class FilteredBlacklistRefreshToken(RefreshToken):
+    """
+    RefreshToken whose blacklist check only hits the database when the
+    in-memory blacklist filter reports a possible match.
+    """
+
+    def check_blacklist(self):
+        if blacklist_filter.may_contain(self.payload[api_settings.JTI_CLAIM]):
+            super().check_blacklist()
+
+    def blacklist(self):
+        blacklisted = super().blacklist()
+        expires_in = self.payload['exp'] - self.current_time.timestamp()
+        blacklist_filter.add(self.payload[api_settings.JTI_CLAIM], expires_in)
+        return blacklisted
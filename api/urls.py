@@ -1,8 +1,18 @@
 
+from django.conf import settings
 from django.urls import path
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from .views import RegisterView, LogoutView, ActivityDetailView
-from .views import ActivityCreateView, ActivityListView
+from .views import ActivityCreateView, ActivityListView, ActivityExportView, ActivityBulkView
+from .views import ActivityStatsView, ActivityCalendarView, ActivitySyncView, ActivityAnalyticsView, QueryMetricsView
+from .views import ActivityProgressView, WeeklyGoalListView, WeeklyGoalDetailView, LeaderboardView
+
+if settings.ASYNC_ACTIVITY_VIEWS:
+    from .async_views import AsyncRegisterView as RegisterView
+    from .async_views import AsyncTokenObtainPairView as TokenObtainPairView
+    from .async_views import AsyncActivityCreateView as ActivityCreateView
+    from .async_views import AsyncActivityListView as ActivityListView
+    from .async_views import AsyncActivityDetailView as ActivityDetailView
 
 urlpatterns = [
     path('auth/register/', RegisterView.as_view(), name='register'),
@@ -10,7 +20,18 @@ urlpatterns = [
     path('auth/logout/', LogoutView.as_view(), name='logout'),
     path('auth/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('activities/create/', ActivityCreateView.as_view(), name='activity-create'),
+    path('activities/bulk/', ActivityBulkView.as_view(), name='activity-bulk'),
     path('activities/', ActivityListView.as_view(), name='activity-list'),
     path('activities/<int:pk>/', ActivityDetailView.as_view(), name='activity-detail'),
+    path('activities/export/', ActivityExportView.as_view(), name='activity-export'),
+    path('activities/stats/', ActivityStatsView.as_view(), name='activity-stats'),
+    path('activities/calendar/', ActivityCalendarView.as_view(), name='activity-calendar'),
+    path('activities/sync/', ActivitySyncView.as_view(), name='activity-sync'),
+    path('activities/analytics/', ActivityAnalyticsView.as_view(), name='activity-analytics'),
+    path('activities/progress/', ActivityProgressView.as_view(), name='activity-progress'),
+    path('goals/', WeeklyGoalListView.as_view(), name='weekly-goal-list'),
+    path('goals/<str:activity_type>/', WeeklyGoalDetailView.as_view(), name='weekly-goal-detail'),
+    path('leaderboards/', LeaderboardView.as_view(), name='leaderboard'),
+    path('ops/query-metrics/', QueryMetricsView.as_view(), name='query-metrics'),
 
 ]
@@ -1,11 +1,32 @@
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import router, transaction
+from django.db.models import Count, Max, Sum
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+from django.http import StreamingHttpResponse
+from django.utils import timezone
 from rest_framework import generics, status, permissions
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken
+from .tokens import FilteredBlacklistRefreshToken
 from .serializers import UserRegistrationSerializer
-from .serializers import ActivitySerializer
-from .models import Activity
+from .serializers import ActivitySerializer, ActivityBulkOperationSerializer, ActivityStatsQuerySerializer
+from .serializers import ActivityCalendarQuerySerializer, ActivityRowSerializer, ActivitySyncQuerySerializer
+from .serializers import ActivityAnalyticsQuerySerializer, LeaderboardQuerySerializer, WeeklyGoalSerializer
+from .serializers import format_datetime
+from .models import Activity, ActivityTombstone, DailyActivitySummary, LeaderboardScore, StreakRun, WeeklyGoal
+from .pagination import ActivityCursorPagination
+from .mixins import CachedResponseMixin, ConditionalGetMixin, SparseFieldsMixin
+from .filters import ActivityFilterBackend
+from .renderers import CSVRenderer, NDJSONRenderer
+from .exports import EXPORT_FIELDS, async_chunks, export_rows, stream_csv, stream_ndjson
+from .services import activity_state, oldest_leaderboard_week, record_activity_changes
+from .services import create_activity, update_activity, delete_activity
+from .instrumentation import endpoint_metrics, timed_serialization
+from . import analytics
 
 # Registration view
 class RegisterView(generics.CreateAPIView):
@@ -30,7 +51,7 @@ class LogoutView(APIView):
             if refresh_token is None:
                 return Response({"error": "Refresh token is required."}, status=status.HTTP_400_BAD_REQUEST)
 
-            token = RefreshToken(refresh_token)
+            token = FilteredBlacklistRefreshToken(refresh_token)
             token.blacklist()  # Blacklist the refresh token
             return Response({"detail": "User logged out successfully."}, status=status.HTTP_205_RESET_CONTENT)
         except Exception as e:
@@ -42,23 +63,155 @@ class ActivityCreateView(generics.CreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        create_activity(self.request.user, serializer)
+
+# Apply a batch of create/update/delete operations in one transaction
+class ActivityBulkView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        envelope = ActivityBulkOperationSerializer(data=request.data, many=True)
+        envelope.is_valid(raise_exception=True)
+        operations = envelope.validated_data
+
+        max_operations = settings.ACTIVITY_BULK_MAX_OPERATIONS
+        if len(operations) > max_operations:
+            return Response({"error": f"A batch may contain at most {max_operations} operations."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        results = [{"op": op['op'], "id": op.get('id')} for op in operations]
+        creates = [i for i, op in enumerate(operations) if op['op'] == 'create']
+        updates = [i for i, op in enumerate(operations) if op['op'] == 'update']
+        deletes = [i for i, op in enumerate(operations) if op['op'] == 'delete']
+
+        # Every id may appear in at most one operation of the batch
+        seen = set()
+        for i in updates + deletes:
+            if operations[i]['id'] in seen:
+                results[i].update(status=status.HTTP_400_BAD_REQUEST,
+                                  errors={"id": ["Duplicate operation for this id."]})
+            seen.add(operations[i]['id'])
+
+        create_serializer = ActivitySerializer(data=[operations[i]['data'] for i in creates], many=True)
+        update_serializer = ActivitySerializer(data=[operations[i]['data'] for i in updates], many=True, partial=True)
+        for indexes, serializer in ((creates, create_serializer), (updates, update_serializer)):
+            if not serializer.is_valid():
+                for i, errors in zip(indexes, serializer.errors):
+                    if errors:
+                        results[i].update(status=status.HTTP_400_BAD_REQUEST, errors=errors)
+
+        with transaction.atomic():
+            # Locked so `before` cannot go stale under a concurrent write of the same ids
+            existing = Activity.objects.select_for_update().filter(user=request.user, id__in=seen).in_bulk()
+            # Updates and deletes alike need a row of this user to act on
+            for i in updates + deletes:
+                if operations[i]['id'] not in existing and 'errors' not in results[i]:
+                    results[i].update(status=status.HTTP_404_NOT_FOUND, errors={"id": ["Not found."]})
+
+            # All-or-nothing: a single invalid operation rejects the whole batch
+            if any('errors' in result for result in results):
+                return Response({"results": results}, status=status.HTTP_400_BAD_REQUEST)
+
+            before = [activity_state(existing[operations[i]['id']]) for i in updates + deletes]
+
+            created = [Activity(user=request.user, **attrs) for attrs in create_serializer.validated_data]
+            Activity.objects.bulk_create(created)
+            for i, instance in zip(creates, created):
+                results[i].update(id=instance.id, status=status.HTTP_201_CREATED,
+                                  data=ActivitySerializer(instance).data)
+
+            now = timezone.now()
+            changed_fields = {'updated_at'}
+            updated = []
+            for i, attrs in zip(updates, update_serializer.validated_data):
+                instance = existing[operations[i]['id']]
+                for field, value in attrs.items():
+                    setattr(instance, field, value)
+                changed_fields.update(attrs)
+                instance.updated_at = now
+                updated.append(instance)
+                results[i].update(status=status.HTTP_200_OK, data=ActivitySerializer(instance).data)
+            written = Activity.objects.bulk_update(updated, fields=sorted(changed_fields)) if updated else 0
+
+            delete_ids = [operations[i]['id'] for i in deletes]
+            deleted = 0
+            if delete_ids:
+                deleted, _ = Activity.objects.filter(user=request.user, id__in=delete_ids).delete()
+
+            # Rows that vanished since they were read would make `before` wrong;
+            # roll the batch back rather than record changes that did not happen.
+            if written != len(updated) or deleted != len(delete_ids):
+                transaction.set_rollback(True)
+                return Response({"error": "Activities in this batch were changed concurrently, retry it."},
+                                status=status.HTTP_409_CONFLICT)
+            for i in deletes:
+                results[i].update(status=status.HTTP_204_NO_CONTENT)
+
+            after = [activity_state(instance) for instance in created + updated]
+            record_activity_changes(request.user, before=before, after=after)
+
+        return Response({"results": results}, status=status.HTTP_200_OK)
 
 # List all user activities
-class ActivityListView(generics.ListAPIView):
+class ActivityListView(SparseFieldsMixin, CachedResponseMixin, ConditionalGetMixin, generics.ListAPIView):
     serializer_class = ActivitySerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ActivityCursorPagination
+    filter_backends = [ActivityFilterBackend]
+    cache_namespace = 'list'
 
     def get_queryset(self):
-        return Activity.objects.filter(user=self.request.user).order_by('-date')
+        return Activity.objects.filter(user=self.request.user).order_by('-date', '-id')
+
+    def list(self, request, *args, **kwargs):
+        # Read-only fast path: tuples from values_list() go straight to
+        # dicts, skipping model instances and ActivitySerializer. Only the
+        # requested fields (plus the pagination keys) are selected.
+        serializer = ActivityRowSerializer(self.get_requested_fields(), extra_columns=('date', 'id'))
+        serialize = serializer.serialize_columnar if self.is_columnar() else serializer.serialize
+        queryset = serializer.values_list(self.filter_queryset(self.get_queryset()))
+
+        paginator = self.paginator
+        if paginator.is_requested(request):
+            rows = list(paginator.get_page_queryset(queryset, request))
+            paginator.set_page(rows, position=serializer.position)
+            with timed_serialization(request):
+                data = serialize(paginator.page)
+            return paginator.get_paginated_response(data)
+        rows = list(queryset)
+        with timed_serialization(request):
+            data = serialize(rows)
+        return Response(data)
 
-class ActivityDetailView(generics.RetrieveUpdateDestroyAPIView):
+    def get_validators(self, request, *args, **kwargs):
+        # A max timestamp alone cannot see deletions, so lists are validated
+        # by ETag (latest update plus row count) only.
+        queryset = self.filter_queryset(self.get_queryset())
+        fingerprint = queryset.aggregate(last=Max('updated_at'), count=Count('id'))
+        return self.make_etag(request, fingerprint['count'], fingerprint['last']), None
+
+class ActivityDetailView(SparseFieldsMixin, CachedResponseMixin, ConditionalGetMixin,
+                         generics.RetrieveUpdateDestroyAPIView):
     serializer_class = ActivitySerializer
     permission_classes = [permissions.IsAuthenticated]
+    cache_namespace = 'detail'
 
     def get_queryset(self):
-        return Activity.objects.filter(user=self.request.user)
-        # Custom message for update
+        queryset = Activity.objects.filter(user=self.request.user)
+        fields = self.get_requested_fields()
+        return queryset.only(*fields) if fields else queryset
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault('fields', self.get_requested_fields())
+        return super().get_serializer(*args, **kwargs)
+
+    def get_validators(self, request, *args, **kwargs):
+        updated_at = self.get_queryset().filter(pk=kwargs['pk']).values_list('updated_at', flat=True).first()
+        if updated_at is None:
+            return None, None
+        return self.make_etag(request, updated_at.isoformat()), updated_at
+
+    # Custom message for update
 
     def update(self, request, *args, **kwargs):
         instance = self.get_object()
@@ -72,4 +225,321 @@ class ActivityDetailView(generics.RetrieveUpdateDestroyAPIView):
         self.perform_destroy(instance)
         return Response({"detail": "Activity deleted successfully!"}, status=status.HTTP_200_OK)
 
+    def perform_update(self, serializer):
+        update_activity(self.request.user, serializer)
+
+    def perform_destroy(self, instance):
+        delete_activity(self.request.user, instance)
+
+
+# Stream the user's full activity history as NDJSON (default) or CSV
+class ActivityExportView(SparseFieldsMixin, APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    renderer_classes = [NDJSONRenderer, CSVRenderer]
+
+    def get(self, request):
+        # Rows are read while streaming, after this request's routing context
+        # is gone, so pick the database now.
+        queryset = (
+            Activity.objects.using(router.db_for_read(Activity))
+            .filter(user=request.user).order_by('-date', '-id')
+        )
+        queryset = ActivityFilterBackend().filter_queryset(request, queryset, self)
+        fields = self.get_requested_fields() or EXPORT_FIELDS
+        rows = export_rows(queryset, chunk_size=settings.ACTIVITY_EXPORT_CHUNK_SIZE, fields=fields)
+
+        renderer = request.accepted_renderer
+        if renderer.format == 'csv':
+            content = stream_csv(rows, fields)
+        else:
+            content = stream_ndjson(rows)
+        if isinstance(request._request, ASGIRequest):
+            # Keeps memory flat under ASGI too, see async_chunks()
+            content = async_chunks(content, settings.ACTIVITY_EXPORT_CHUNK_SIZE)
+
+        response = StreamingHttpResponse(content, content_type=f"{renderer.media_type}; charset=utf-8")
+        response['Content-Disposition'] = f'attachment; filename="activities.{renderer.format}"'
+        return response
+
+
+# Activity counts per day/week/month, grouped by activity_type and status
+class ActivityStatsView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    TRUNCATE = {
+        'day': TruncDay,
+        'week': TruncWeek,
+        'month': TruncMonth,
+    }
+
+    def get(self, request):
+        params = ActivityStatsQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        period = params.validated_data['period']
+
+        queryset = Activity.objects.filter(user=request.user)
+        if 'start' in params.validated_data:
+            queryset = queryset.filter(date__gte=params.validated_data['start'])
+        if 'end' in params.validated_data:
+            queryset = queryset.filter(date__lte=params.validated_data['end'])
+
+        buckets = (
+            queryset
+            .annotate(bucket=self.TRUNCATE[period]('date'))
+            .values('bucket', 'activity_type', 'status')
+            .annotate(count=Count('id'))
+            .order_by('bucket', 'activity_type', 'status')
+        )
+        return Response({
+            "period": period,
+            "start": params.validated_data.get('start'),
+            "end": params.validated_data.get('end'),
+            "buckets": [
+                {
+                    "period": row['bucket'].isoformat(),
+                    "activity_type": row['activity_type'],
+                    "status": row['status'],
+                    "count": row['count'],
+                }
+                for row in buckets
+            ],
+        })
+
+
+# Daily, rolling, weekly and percentile statistics of the numeric metrics
+class ActivityAnalyticsView(APIView):
+    """
+    Metric analytics over a date range (the last 365 days by default),
+    computed by api.analytics. Only completed activities count unless
+    `status` says otherwise.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        if not analytics.available():
+            return Response(
+                {"detail": "Analytics are unavailable: numpy is not installed."},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+        params = ActivityAnalyticsQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        filters = params.validated_data
+
+        queryset = Activity.objects.filter(user=request.user, status=filters['status'])
+        if 'activity_type' in filters:
+            queryset = queryset.filter(activity_type=filters['activity_type'])
+        return Response({
+            "start": filters['start'],
+            "end": filters['end'],
+            "window": filters['window'],
+            **analytics.analyze(queryset, filters['start'], filters['end'], filters['window'], filters['metrics']),
+        })
+
+
+# Current and longest streaks per activity type, and this week's goal progress
+class ActivityProgressView(APIView):
+    """
+    Reads the StreakRun and DailyActivitySummary rows maintained by
+    api.services, so the cost does not grow with the activity history.
+
+    A streak is current while its last day is today or yesterday: an
+    activity completed later today keeps it going.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        today = date.today()
+        week_start = today - timedelta(days=today.weekday())
+        runs = StreakRun.objects.filter(user=request.user)
+        current = {
+            run.activity_type: run
+            for run in runs.filter(start_date__lte=today, end_date__gte=today - timedelta(days=1))
+        }
+
+        streaks = []
+        for activity_type, _ in Activity.ACTIVITY_TYPE_CHOICES:
+            run = current.get(activity_type)
+            longest = runs.filter(activity_type=activity_type).order_by('-length', '-end_date').first()
+            streaks.append({
+                "activity_type": activity_type,
+                "current": (min(run.end_date, today) - run.start_date).days + 1 if run else 0,
+                "current_start": run.start_date if run else None,
+                "longest": longest.length if longest else 0,
+                "longest_start": longest.start_date if longest else None,
+                "longest_end": longest.end_date if longest else None,
+            })
+
+        completed = dict(
+            DailyActivitySummary.objects
+            .filter(user=request.user, status='completed', date__gte=week_start, date__lte=today)
+            .values('activity_type')
+            .annotate(total=Sum('count'))
+            .values_list('activity_type', 'total')
+        )
+        goals = []
+        for goal in WeeklyGoal.objects.filter(user=request.user).order_by('activity_type'):
+            done = completed.get(goal.activity_type, 0)
+            goals.append({
+                "activity_type": goal.activity_type,
+                "target": goal.target,
+                "completed": done,
+                "remaining": max(goal.target - done, 0),
+                "achieved": done >= goal.target,
+            })
+
+        return Response({"date": today, "week_start": week_start, "streaks": streaks, "goals": goals})
+
+
+class WeeklyGoalListView(generics.ListCreateAPIView):
+    """Lists the user's weekly goals; POST sets the goal for an activity type."""
+    serializer_class = WeeklyGoalSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = None
+
+    def get_queryset(self):
+        return WeeklyGoal.objects.filter(user=self.request.user).order_by('activity_type')
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        goal, created = WeeklyGoal.objects.update_or_create(
+            user=request.user,
+            activity_type=serializer.validated_data['activity_type'],
+            defaults={'target': serializer.validated_data['target']},
+        )
+        return Response(self.get_serializer(goal).data,
+                        status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
+
+class WeeklyGoalDetailView(generics.RetrieveUpdateDestroyAPIView):
+    serializer_class = WeeklyGoalSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    lookup_field = 'activity_type'
+
+    def get_queryset(self):
+        return WeeklyGoal.objects.filter(user=self.request.user)
+
+    def perform_update(self, serializer):
+        # The activity type identifies the goal and is not changed here.
+        serializer.save(activity_type=self.kwargs['activity_type'])
+
+
+# Weekly ranking of users by completed activities of one type
+class LeaderboardView(APIView):
+    """
+    Top `limit` users of a week and the requesting user's own rank, read
+    from LeaderboardScore through its (period, type, -score) index. Tied
+    scores share a rank, so the rank is one more than the number of users
+    with a higher score.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        params = LeaderboardQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        activity_type = params.validated_data['activity_type']
+        period_start = params.validated_data['week_start']
+        if period_start < oldest_leaderboard_week():
+            return Response({"week": "This week is no longer kept on the leaderboards."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        scores = LeaderboardScore.objects.filter(period_start=period_start, activity_type=activity_type)
+        top = scores.order_by('-score', 'user_id').values_list('user_id', 'user__username', 'score')
+        entries = []
+        for user_id, username, score in top[:params.validated_data['limit']]:
+            rank = entries[-1]["rank"] if entries and entries[-1]["score"] == score else len(entries) + 1
+            entries.append({"rank": rank, "username": username, "score": score})
+
+        mine = scores.filter(user=request.user).values_list('score', flat=True).first()
+        return Response({
+            "activity_type": activity_type,
+            "week_start": period_start,
+            "entries": entries,
+            "me": {
+                "rank": scores.filter(score__gt=mine).count() + 1 if mine else None,
+                "score": mine or 0,
+            },
+        })
+
+
+# Activities changed since a client watermark, plus the ids of deleted ones
+class ActivitySyncView(APIView):
+    """
+    Delta sync for offline clients.
+
+    Without `since`, or with a watermark older than the tombstone retention,
+    the response is a full snapshot (`"full": true`) that replaces the
+    client's copy. Otherwise it holds the activities updated since the
+    watermark and the ids deleted since then. The returned watermark trails
+    the current time by ACTIVITY_SYNC_OVERLAP_SECONDS, so the most recent
+    changes are sent twice rather than missed when a slower transaction
+    commits with an older timestamp; clients upsert by id.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        params = ActivitySyncQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        since = params.validated_data.get('since')
+
+        now = timezone.now()
+        watermark = now - timedelta(seconds=settings.ACTIVITY_SYNC_OVERLAP_SECONDS)
+        horizon = now - timedelta(days=settings.ACTIVITY_TOMBSTONE_RETENTION_DAYS)
+        full = since is None or since < horizon
+
+        # The overlap covers in-flight transactions but not replica lag, so
+        # always read from the primary.
+        database = router.db_for_write(Activity)
+        changed = Activity.objects.using(database).filter(user=request.user)
+        deleted = ActivityTombstone.objects.none()
+        if not full:
+            changed = changed.filter(updated_at__gte=since)
+            deleted = ActivityTombstone.objects.using(database).filter(user=request.user, deleted_at__gte=since)
+
+        serializer = ActivityRowSerializer()
+        return Response({
+            "watermark": format_datetime(watermark),
+            "full": full,
+            "changed": serializer.serialize(serializer.values_list(changed.order_by('updated_at', 'id'))),
+            "deleted": list(deleted.order_by('deleted_at', 'id').values_list('activity_id', flat=True)),
+        })
+
+
+# Per-day activity counts for one calendar month, read from the summary table
+class ActivityCalendarView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        params = ActivityCalendarQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        first_day = params.validated_data['month']
+        next_month = (first_day + timedelta(days=32)).replace(day=1)
+
+        days = (
+            DailyActivitySummary.objects
+            .filter(user=request.user, date__gte=first_day, date__lt=next_month)
+            .order_by('date', 'activity_type', 'status')
+            .values_list('date', 'activity_type', 'status', 'count')
+        )
+        return Response({
+            "month": first_day.strftime('%Y-%m'),
+            "days": [
+                {"date": day.isoformat(), "activity_type": activity_type, "status": activity_status, "count": count}
+                for day, activity_type, activity_status, count in days
+            ],
+        })
+
+
+# Aggregated per-endpoint query/timing metrics of this process (admins only)
+class QueryMetricsView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response({
+            "enabled": settings.QUERY_INSTRUMENTATION,
+            "endpoints": endpoint_metrics.snapshot(),
+        })
 
+    def delete(self, request):
+        endpoint_metrics.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
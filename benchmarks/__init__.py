@@ -0,0 +1,15 @@
+"""
+Latency and throughput benchmarks, run with `manage.py benchmark <suite>`.
+
+Each suite module exposes `add_arguments(parser)` and `run(options, stdout)`,
+returning a dict of per-operation results as built by harness.summarize().
+"""
+
+SUITES = {
+    'analytics': 'benchmarks.analytics',
+    'api': 'benchmarks.api',
+    'db_connections': 'benchmarks.db_connections',
+    'hashers': 'benchmarks.hashers',
+    'middleware': 'benchmarks.middleware',
+    'serialization': 'benchmarks.serialization',
+}
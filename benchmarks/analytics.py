@@ -0,0 +1,70 @@
+"""
+Cost of the metric analytics for one user.
+
+Seeds `--days` days with `--per-day` completed activities each, all four
+metrics filled in, then times `--repeat` runs of:
+
+  load     the values_list() query and the conversion to NumPy columns
+  analyze  api.analytics.analyze(), i.e. load plus every statistic
+"""
+import time
+import uuid
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+
+from api import analytics
+from api.models import Activity
+
+from .harness import summarize
+
+END = date(2025, 12, 31)
+
+
+def add_arguments(parser):
+    parser.add_argument('--days', type=int, default=365, help="Days of seeded data.")
+    parser.add_argument('--per-day', type=int, default=3, help="Activities per seeded day.")
+    parser.add_argument('--repeat', type=int, default=20, help="Timed runs per operation.")
+    parser.add_argument('--window', type=int, default=7, help="Rolling average window in days.")
+
+
+def seed(days, per_day):
+    user = User.objects.create_user(username=f"bench-analytics-{uuid.uuid4().hex[:8]}")
+    Activity.objects.bulk_create([
+        Activity(
+            user=user,
+            activity_type='workout',
+            status='completed',
+            date=END - timedelta(days=i // per_day),
+            duration_minutes=20 + i % 60,
+            calories=150 + i % 400,
+            distance_km=round(1 + (i % 90) / 10, 1),
+            steps=2000 + i % 9000,
+        )
+        for i in range(days * per_day)
+    ], batch_size=1000)
+    return Activity.objects.filter(user=user, status='completed')
+
+
+def timed(func, repeat):
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - start)
+    return summarize(latencies)
+
+
+def run(options, stdout):
+    if not analytics.available():
+        stdout.write("Skipping analytics: numpy is not installed.")
+        return {}
+    queryset = seed(options['days'], options['per_day'])
+    start = END - timedelta(days=options['days'] - 1)
+    in_range = queryset.filter(date__gte=start, date__lte=END)
+    results = {
+        'load': timed(lambda: analytics.load_metrics(in_range), options['repeat']),
+        'analyze': timed(lambda: analytics.analyze(queryset, start, END, options['window']), options['repeat']),
+    }
+    stdout.write(f"Analyzed {options['days'] * options['per_day']} activities over {options['days']} days per run.")
+    return results
@@ -0,0 +1,120 @@
+"""
+End-to-end benchmark of the public API surface.
+
+Seeds `--users` accounts with `--activities` activities each through the API
+itself (so it also works against a running server via --url), then issues
+`--requests` calls per operation and reports latency percentiles, requests
+per second and, in-process, queries per request.
+"""
+import itertools
+import json
+import time
+import uuid
+
+from .harness import Recorder, open_transport, summarize
+
+PASSWORD = 'Bench-Pass-2025!'
+OPERATIONS = ['register', 'login', 'refresh', 'list', 'list_page', 'detail', 'create', 'update', 'delete']
+ACTIVITY_TYPES = ['workout', 'meal', 'steps']
+
+
+def add_arguments(parser):
+    parser.add_argument('--users', type=int, default=5, help="Accounts to seed.")
+    parser.add_argument('--activities', type=int, default=200, help="Activities seeded per account.")
+    parser.add_argument('--requests', type=int, default=50, help="Requests issued per operation.")
+    parser.add_argument('--transport', choices=['client', 'wsgi', 'asgi'], default='client',
+                        help="Test client in-process, or a real WSGI/ASGI server in a background thread.")
+    parser.add_argument('--url', help="Benchmark an already running server at this base URL instead.")
+    parser.add_argument('--operations', nargs='+', choices=OPERATIONS, default=OPERATIONS)
+
+
+class Session:
+    def __init__(self, transport):
+        self.transport = transport
+
+    def call(self, method, path, data=None, token=None, expect=200):
+        status, content, latency, queries = self.transport.request(method, path, data, token)
+        if status != expect:
+            raise RuntimeError(f"{method} {path} returned {status}, expected {expect}: {content[:200]!r}")
+        return json.loads(content) if content else None, latency, queries
+
+
+def seed(session, users, activities, run_id):
+    accounts = []
+    for n in range(users):
+        username = f"bench-{run_id}-{n}"
+        session.call('POST', '/api/auth/register/', {
+            'username': username, 'email': f"{username}@example.com",
+            'password': PASSWORD, 'password2': PASSWORD,
+        }, expect=201)
+        tokens, _, _ = session.call('POST', '/api/auth/login/', {'username': username, 'password': PASSWORD})
+
+        ids = []
+        for start in range(0, activities, 500):
+            operations = [
+                {'op': 'create', 'data': {
+                    'activity_type': ACTIVITY_TYPES[i % 3],
+                    'description': f"Seeded activity {i}",
+                    'date': f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}",
+                }}
+                for i in range(start, min(start + 500, activities))
+            ]
+            body, _, _ = session.call('POST', '/api/activities/bulk/', operations, token=tokens['access'])
+            ids.extend(result['id'] for result in body['results'])
+        accounts.append({'username': username, 'tokens': tokens, 'ids': ids})
+    return accounts
+
+
+def run(options, stdout):
+    run_id = uuid.uuid4().hex[:8]
+    results = {}
+    with open_transport(options['transport'], options.get('url')) as transport:
+        session = Session(transport)
+        accounts = seed(session, options['users'], options['activities'], run_id)
+        stdout.write(f"Seeded {len(accounts)} users x {options['activities']} activities over {transport.name}.")
+
+        for operation in options['operations']:
+            recorder = Recorder()
+            requests = operation_requests(operation, accounts, options['requests'], run_id)
+            started = time.perf_counter()
+            for method, path, data, token, expect in requests:
+                _, latency, queries = session.call(method, path, data, token, expect)
+                recorder.add(latency, queries)
+            elapsed = time.perf_counter() - started
+            results[operation] = summarize(recorder.latencies, recorder.queries, elapsed)
+    return results
+
+
+def operation_requests(operation, accounts, count, run_id):
+    """Yield (method, path, data, token, expected status) for one operation."""
+    cycle = itertools.cycle(accounts)
+    for n in range(count):
+        account = next(cycle)
+        access = account['tokens']['access']
+        activity_id = account['ids'][n % len(account['ids'])] if account['ids'] else None
+
+        if operation == 'register':
+            username = f"bench-{run_id}-new-{n}"
+            yield 'POST', '/api/auth/register/', {
+                'username': username, 'email': f"{username}@example.com",
+                'password': PASSWORD, 'password2': PASSWORD,
+            }, None, 201
+        elif operation == 'login':
+            yield 'POST', '/api/auth/login/', {'username': account['username'], 'password': PASSWORD}, None, 200
+        elif operation == 'refresh':
+            yield 'POST', '/api/auth/token/refresh/', {'refresh': account['tokens']['refresh']}, None, 200
+        elif operation == 'list':
+            yield 'GET', '/api/activities/', None, access, 200
+        elif operation == 'list_page':
+            yield 'GET', '/api/activities/?page_size=50', None, access, 200
+        elif operation == 'detail':
+            yield 'GET', f"/api/activities/{activity_id}/", None, access, 200
+        elif operation == 'create':
+            yield 'POST', '/api/activities/create/', {
+                'activity_type': 'workout', 'description': 'Benchmark', 'date': '2025-06-01',
+            }, access, 201
+        elif operation == 'update':
+            yield 'PATCH', f"/api/activities/{activity_id}/", {'status': 'completed'}, access, 200
+        elif operation == 'delete':
+            # Delete from the end of each account's seeded rows so reads keep their targets
+            yield 'DELETE', f"/api/activities/{account['ids'].pop()}/", None, access, 200
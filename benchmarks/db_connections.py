@@ -0,0 +1,71 @@
+"""
+Per-request database connection cost for each connection reuse mode.
+
+Every simulated request runs Django's request_started/request_finished
+connection housekeeping around one query, on a private connection built from
+the default database settings:
+
+  fresh       CONN_MAX_AGE=0, a new connection (TCP + auth) for every request
+  persistent  CONN_MAX_AGE with health checks, one connection reused
+  pool        psycopg connection pool (PostgreSQL with psycopg-pool only)
+"""
+import copy
+import time
+
+from django.db import connections
+from django.db.utils import ConnectionHandler
+
+from .harness import summarize
+
+MODES = ['fresh', 'persistent', 'pool']
+
+
+def add_arguments(parser):
+    parser.add_argument('--requests', type=int, default=200, help="Simulated requests per mode.")
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=MODES)
+
+
+def configure(base, mode):
+    settings_dict = copy.deepcopy(base)
+    settings_dict['OPTIONS'].pop('pool', None)
+    if mode == 'fresh':
+        settings_dict.update(CONN_MAX_AGE=0, CONN_HEALTH_CHECKS=False)
+    elif mode == 'persistent':
+        settings_dict.update(CONN_MAX_AGE=600, CONN_HEALTH_CHECKS=True)
+    elif mode == 'pool':
+        if settings_dict['ENGINE'] != 'django.db.backends.postgresql':
+            return None
+        try:
+            from psycopg_pool import ConnectionPool
+        except ImportError:
+            return None
+        settings_dict.update(CONN_MAX_AGE=0, CONN_HEALTH_CHECKS=False)
+        settings_dict['OPTIONS']['pool'] = {'min_size': 1, 'max_size': 4, 'check': ConnectionPool.check_connection}
+    return settings_dict
+
+
+def run(options, stdout):
+    base = connections['default'].settings_dict
+    results = {}
+    for mode in options['modes']:
+        settings_dict = configure(base, mode)
+        if settings_dict is None:
+            stdout.write(f"Skipping {mode}: needs PostgreSQL with psycopg-pool installed.")
+            continue
+
+        connection = ConnectionHandler({'default': settings_dict})['default']
+        latencies = []
+        for _ in range(options['requests']):
+            start = time.perf_counter()
+            connection.close_if_unusable_or_obsolete()  # request_started
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+                cursor.fetchone()
+            connection.close_if_unusable_or_obsolete()  # request_finished
+            latencies.append(time.perf_counter() - start)
+
+        connection.close()
+        if mode == 'pool':
+            connection.close_pool()
+        results[mode] = summarize(latencies)
+    return results
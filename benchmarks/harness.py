@@ -0,0 +1,195 @@
+import json
+import math
+import platform
+import threading
+import time
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+
+import django
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(latencies, queries=None, elapsed=None):
+    """
+    Latencies are in seconds; results are reported in milliseconds. Queries
+    per request are only known when the benchmark runs in-process.
+    """
+    elapsed = elapsed if elapsed is not None else sum(latencies)
+    return {
+        'count': len(latencies),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'rps': round(len(latencies) / elapsed, 1) if elapsed else None,
+        'queries_per_request': round(sum(queries) / len(queries), 2) if queries else None,
+    }
+
+
+class Recorder:
+    """Collects latency and query counts for one named operation."""
+
+    def __init__(self):
+        self.latencies = []
+        self.queries = []
+
+    def add(self, latency, queries=None):
+        self.latencies.append(latency)
+        if queries is not None:
+            self.queries.append(queries)
+
+    def summary(self):
+        return summarize(self.latencies, self.queries)
+
+
+class ClientTransport:
+    """Drives the API in-process through Django's test client."""
+    name = 'client'
+
+    def __init__(self):
+        self.client = Client()
+
+    def request(self, method, path, data=None, token=None):
+        send = getattr(self.client, method.lower())
+        kwargs = {'headers': {'Authorization': f'Bearer {token}'} if token else {}}
+        if data is not None:
+            kwargs.update(data=json.dumps(data), content_type='application/json')
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            response = send(path, **kwargs)
+            content = b''.join(response.streaming_content) if response.streaming else response.content
+            latency = time.perf_counter() - start
+        return response.status_code, content, latency, len(queries)
+
+    def close(self):
+        pass
+
+
+class HTTPTransport:
+    """Drives the API over real HTTP against `base_url`."""
+
+    def __init__(self, base_url, name='http'):
+        self.base_url = base_url.rstrip('/')
+        self.name = name
+
+    def request(self, method, path, data=None, token=None):
+        headers = {'Content-Type': 'application/json'}
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        body = json.dumps(data).encode() if data is not None else None
+        request = urllib.request.Request(self.base_url + path, data=body, method=method, headers=headers)
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request) as response:
+                status, content = response.status, response.read()
+        except urllib.error.HTTPError as error:
+            status, content = error.code, error.read()
+        return status, content, time.perf_counter() - start, None
+
+    def close(self):
+        pass
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class WSGIServerTransport(HTTPTransport):
+    """Serves the project's WSGI application from a background thread."""
+
+    def __init__(self):
+        from django.core.wsgi import get_wsgi_application
+
+        self.server = ThreadedWSGIServer(('127.0.0.1', 0), QuietRequestHandler, allow_reuse_address=True)
+        self.server.set_app(get_wsgi_application())
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        super().__init__(f'http://127.0.0.1:{self.server.server_port}', name='wsgi')
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class ASGIServerTransport(HTTPTransport):
+    """Serves the project's ASGI application with uvicorn from a background thread."""
+
+    def __init__(self):
+        import socket
+
+        import uvicorn
+        from django.core.asgi import get_asgi_application
+
+        sock = socket.socket()
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+        sock.close()
+
+        config = uvicorn.Config(get_asgi_application(), host='127.0.0.1', port=port,
+                                lifespan='off', log_level='warning')
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        super().__init__(f'http://127.0.0.1:{port}', name='asgi')
+
+    def close(self):
+        self.server.should_exit = True
+        self.thread.join()
+
+
+TRANSPORTS = {
+    'client': ClientTransport,
+    'wsgi': WSGIServerTransport,
+    'asgi': ASGIServerTransport,
+}
+
+
+@contextmanager
+def open_transport(name, base_url=None):
+    transport = HTTPTransport(base_url) if base_url else TRANSPORTS[name]()
+    try:
+        yield transport
+    finally:
+        transport.close()
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': connection.vendor,
+        'machine': platform.machine(),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """
+    Return human-readable regressions of `results` against a saved baseline:
+    p95 latency beyond the tolerance, or any increase in queries per request.
+    """
+    regressions = []
+    for operation, current in results.items():
+        previous = baseline.get('results', {}).get(operation)
+        if not previous:
+            continue
+        if current['p95_ms'] > previous['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{operation}: p95 {previous['p95_ms']}ms -> {current['p95_ms']}ms")
+        if (current['queries_per_request'] or 0) > (previous['queries_per_request'] or 0):
+            regressions.append(
+                f"{operation}: queries/request {previous['queries_per_request']} -> {current['queries_per_request']}"
+            )
+    return regressions
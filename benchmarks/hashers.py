@@ -0,0 +1,63 @@
+"""
+Password hasher cost: logins per second per core for each hasher profile.
+
+A login is dominated by one password verification, so each profile hashes a
+password once and then times `--logins` verifications on a single thread;
+`rps` is therefore logins per second per core. With `--threads` above one,
+the same number of verifications also runs through the async views' hashing
+pool and is reported as "<profile>-pool", showing how far the hasher scales
+across cores.
+
+  pbkdf2          Django's default PBKDF2-SHA256
+  argon2-default  Django's Argon2PasswordHasher parameters
+  argon2          api.hashers.TunedArgon2PasswordHasher (ARGON2_* settings)
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.hashers import Argon2PasswordHasher, PBKDF2PasswordHasher
+
+from api.hashers import TunedArgon2PasswordHasher
+
+from .harness import summarize
+
+PASSWORD = 'Bench-Pass-2025!'
+PROFILES = {
+    'pbkdf2': PBKDF2PasswordHasher,
+    'argon2-default': Argon2PasswordHasher,
+    'argon2': TunedArgon2PasswordHasher,
+}
+
+
+def add_arguments(parser):
+    parser.add_argument('--logins', type=int, default=20, help="Password verifications per profile.")
+    parser.add_argument('--threads', type=int, default=1, help="Also run the verifications on this many threads.")
+    parser.add_argument('--profiles', nargs='+', choices=list(PROFILES), default=list(PROFILES))
+
+
+def timed_verify(hasher, encoded):
+    start = time.perf_counter()
+    if not hasher.verify(PASSWORD, encoded):
+        raise RuntimeError(f"{hasher.algorithm} failed to verify its own hash.")
+    return time.perf_counter() - start
+
+
+def run(options, stdout):
+    results = {}
+    for name in options['profiles']:
+        hasher = PROFILES[name]()
+        try:
+            encoded = hasher.encode(PASSWORD, hasher.salt())
+        except ValueError as exc:
+            # Raised by Django when the hasher's library is missing.
+            stdout.write(f"Skipping {name}: {exc}")
+            continue
+
+        results[name] = summarize([timed_verify(hasher, encoded) for _ in range(options['logins'])])
+
+        if options['threads'] > 1:
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+                latencies = list(pool.map(lambda _: timed_verify(hasher, encoded), range(options['logins'])))
+            results[f"{name}-pool"] = summarize(latencies, elapsed=time.perf_counter() - started)
+    return results
@@ -0,0 +1,85 @@
+"""
+Per-request cost of the middleware stack, API-only pipeline versus the
+classic one with sessions, CSRF, auth, messages and clickjacking middleware
+on every request.
+
+Issues `--requests` activity list calls and `--logins` logins in-process
+under each pipeline. Only the MIDDLEWARE setting differs between the two
+runs, so the difference in latency is the overhead the API-only pipeline
+removes.
+"""
+import time
+import uuid
+from datetime import date
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.test import Client, override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api.models import Activity
+
+from .harness import summarize
+
+PASSWORD = 'Bench-Pass-2025!'
+PIPELINES = ['classic', 'api_only']
+
+
+def add_arguments(parser):
+    parser.add_argument('--requests', type=int, default=200, help="Activity list requests per pipeline.")
+    parser.add_argument('--logins', type=int, default=20, help="Logins per pipeline.")
+    parser.add_argument('--activities', type=int, default=20, help="Activities in the listed account.")
+
+
+def middleware_for(pipeline):
+    middleware = list(settings.MIDDLEWARE)
+    if 'api.middleware.AdminOnlyMiddleware' not in middleware:
+        # Already the classic stack (API_ONLY_PIPELINE=false).
+        return middleware if pipeline == 'classic' else None
+    if pipeline == 'api_only':
+        return middleware
+    position = middleware.index('api.middleware.AdminOnlyMiddleware')
+    middleware[position:position + 1] = settings.ADMIN_MIDDLEWARE
+    return middleware
+
+
+def timed(client, method, path, data=None, **extra):
+    start = time.perf_counter()
+    response = getattr(client, method)(path, data, **extra)
+    latency = time.perf_counter() - start
+    if response.status_code != 200:
+        raise RuntimeError(f"{method.upper()} {path} returned {response.status_code}")
+    return latency
+
+
+def run(options, stdout):
+    username = f"bench-middleware-{uuid.uuid4().hex[:8]}"
+    user = User.objects.create_user(username=username, password=PASSWORD)
+    Activity.objects.bulk_create([
+        Activity(user=user, activity_type='workout', date=date(2025, 1, 1 + n % 28))
+        for n in range(options['activities'])
+    ])
+    headers = {'Authorization': f"Bearer {RefreshToken.for_user(user).access_token}"}
+    credentials = {'username': username, 'password': PASSWORD}
+
+    clients = {}
+    for pipeline in PIPELINES:
+        middleware = middleware_for(pipeline)
+        if middleware is None:
+            stdout.write(f"Skipping {pipeline}: API_ONLY_PIPELINE is off.")
+            continue
+        with override_settings(MIDDLEWARE=middleware):
+            # The client's handler loads its middleware chain on the first
+            # request and keeps it afterwards.
+            clients[pipeline] = Client()
+            clients[pipeline].get('/api/activities/', headers=headers)
+
+    # Alternate between the pipelines so drift affects both equally.
+    latencies = {f"{pipeline}:{operation}": [] for pipeline in clients for operation in ('list', 'login')}
+    for _ in range(options['requests']):
+        for pipeline, client in clients.items():
+            latencies[f"{pipeline}:list"].append(timed(client, 'get', '/api/activities/', headers=headers))
+    for _ in range(options['logins']):
+        for pipeline, client in clients.items():
+            latencies[f"{pipeline}:login"].append(timed(client, 'post', '/api/auth/login/', credentials))
+    return {name: summarize(values) for name, values in latencies.items()}
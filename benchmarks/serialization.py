@@ -0,0 +1,77 @@
+"""
+Serialization cost of one large activity list, DRF versus the lean path.
+
+Seeds `--rows` activities for one user directly in the database, then times
+reading and rendering them `--repeat` times each way:
+
+  drf   model instances, ActivitySerializer(many=True) and JSONRenderer
+  lean  values_list() tuples, ActivityRowSerializer and FastJSONRenderer
+
+Both must render identical bytes; the suite aborts if they do not.
+"""
+import time
+import uuid
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from rest_framework.renderers import JSONRenderer
+
+from api.models import Activity
+from api.renderers import FastJSONRenderer
+from api.serializers import ActivityRowSerializer, ActivitySerializer
+
+from .harness import summarize
+
+MODES = ['drf', 'lean']
+ACTIVITY_TYPES = ['workout', 'meal', 'steps']
+
+
+def add_arguments(parser):
+    parser.add_argument('--rows', type=int, default=10000, help="Activities to serialize per run.")
+    parser.add_argument('--repeat', type=int, default=10, help="Timed runs per mode.")
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=MODES)
+
+
+def seed(rows):
+    user = User.objects.create_user(username=f"bench-serialization-{uuid.uuid4().hex[:8]}")
+    Activity.objects.bulk_create([
+        Activity(
+            user=user,
+            activity_type=ACTIVITY_TYPES[i % 3],
+            description=f"Seeded activity {i} – café",
+            date=date(2025, 1, 1) + timedelta(days=i % 365),
+            status='completed' if i % 2 else 'planned',
+        )
+        for i in range(rows)
+    ], batch_size=1000)
+    return Activity.objects.filter(user=user).order_by('-date', '-id')
+
+
+def render_drf(queryset):
+    return JSONRenderer().render(ActivitySerializer(list(queryset), many=True).data)
+
+
+def render_lean(queryset):
+    serializer = ActivityRowSerializer()
+    return FastJSONRenderer().render(serializer.serialize(serializer.values_list(queryset)))
+
+
+RENDER = {'drf': render_drf, 'lean': render_lean}
+
+
+def run(options, stdout):
+    queryset = seed(options['rows'])
+    if render_drf(queryset) != render_lean(queryset):
+        raise RuntimeError("Lean serialization output differs from ActivitySerializer + JSONRenderer.")
+
+    results = {}
+    for mode in options['modes']:
+        render = RENDER[mode]
+        latencies = []
+        for _ in range(options['repeat']):
+            start = time.perf_counter()
+            render(queryset)
+            latencies.append(time.perf_counter() - start)
+        results[mode] = summarize(latencies)
+    stdout.write(f"Serialized {options['rows']} activities per run.")
+    return results
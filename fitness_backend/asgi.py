@@ -9,8 +9,14 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 
 import os
 
+from django.conf import settings
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'fitness_backend.settings')
 
 application = get_asgi_application()
+
+if settings.COLD_START_MODE:
+    from api.startup import warm_url_resolvers
+
+    warm_url_resolvers()
@@ -14,12 +14,17 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from django.contrib import admin
+from django.apps import apps
 from django.urls import path, include
 from django.http import JsonResponse
 
 urlpatterns = [
 
-    path('admin/', admin.site.urls),
     path('api/', include('api.urls')),  # your register/login endpoints
 ]
+
+# The admin is left out of INSTALLED_APPS in cold-start mode.
+if apps.is_installed('django.contrib.admin'):
+    from django.contrib import admin
+
+    urlpatterns.insert(0, path('admin/', admin.site.urls))
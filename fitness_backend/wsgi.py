@@ -9,9 +9,16 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'fitness_backend.settings')
 
 application = get_wsgi_application()
+
+if settings.COLD_START_MODE:
+    from api.startup import warm_url_resolvers
+
+    warm_url_resolvers()
+
 app = application
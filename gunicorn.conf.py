@@ -0,0 +1,22 @@
+# Gunicorn configuration for both serving profiles.
+#
+#   SERVER_MODE=wsgi  gunicorn -c gunicorn.conf.py   # sync workers, WSGI app
+#   SERVER_MODE=asgi  gunicorn -c gunicorn.conf.py   # uvicorn workers, ASGI app
+import multiprocessing
+import os
+
+server_mode = os.getenv("SERVER_MODE", "wsgi")
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+accesslog = "-"
+
+if server_mode == "asgi":
+    wsgi_app = "fitness_backend.asgi:application"
+    worker_class = "uvicorn_worker.UvicornWorker"
+else:
+    wsgi_app = "fitness_backend.wsgi:application"
+    worker_class = "sync"